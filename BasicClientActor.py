@@ -1,7 +1,7 @@
 import math
 from BasicClientActorAbs import BasicClientActorAbs
 from Environment import Environment
-from NeuralNet import NeuralNet
+from NumpyNet import load_agent
 import numpy as np
 
 from GlobalConstants import grid_size as BCA_grid_size
@@ -45,7 +45,7 @@ class BasicClientActor(BasicClientActorAbs):
             flip = True
         # If I start and I am -1, then I have to invert and flip the board and become 1
         if self.starting_player == self.series_id and self.series_id == 2:
-            board = env.flip_state(board)
+            board = self.env.flip_state(board)
             my_player = 1
             flip = True
 
@@ -53,12 +53,12 @@ class BasicClientActor(BasicClientActorAbs):
         possible_actions = self.env.get_possible_actions_from_state(board)
         best_action_index = self.agent.default_policy(possible_actions, board, my_player)
 
-        # Convert index to row and column
+        # Back to the index on the real board
         if flip:
-            return (best_action_index % BCA_grid_size, best_action_index//BCA_grid_size)
-        else:
-            return (best_action_index//BCA_grid_size,
-                    best_action_index % BCA_grid_size)
+            best_action_index = self.env.flip_action(best_action_index)
+        # Convert index to row and column
+        return (int(best_action_index//self.env.grid_size),
+                int(best_action_index % self.env.grid_size))
 
     def handle_series_start(self, unique_id, series_id, player_map, num_games, game_params):
         """
@@ -166,8 +166,8 @@ class BasicClientActor(BasicClientActorAbs):
 
 if __name__ == '__main__':
     env = Environment(BCA_grid_size)
-    agent = NeuralNet(BCA_grid_size**2+1)
-    agent.load_params('./rung_long_OTH2/6_100_5000_11_100')
+    # Without TensorFlow if the parameters have an .npz copy
+    agent = load_agent('./rung_long_OTH2/6_100_5000_11_100', BCA_grid_size**2+1)
 
     bsa = BasicClientActor(agent, env)
     bsa.connect_to_server()
@@ -0,0 +1,178 @@
+from functools import lru_cache
+import numpy as np
+from Board import Board
+from Geometry import get_geometry
+
+
+class BitGeometry:
+    def __init__(self, grid_size):
+        """
+        Bit tables for BitBoard, built once per grid size by get_bit_geometry
+
+        Boardcell (row, column) is bit row*(grid_size+1) + column. The extra bit in each row
+        is always empty, so shifting a mask to a neighbour can not wrap around to the next row.
+        """
+        geometry = get_geometry(grid_size)
+        self.width = grid_size + 1
+        # Bit for each boardcell, indexed like the ndarray grid
+        self.cell_bits = tuple(1 << int(row*self.width + column)
+                               for row, column in zip(geometry.rows, geometry.columns))
+        # Bit position of the transposed boardcell, (row, column) -> (column, row)
+        self.transposed_bits = {bit.bit_length()-1: self.cell_bits[geometry.flip_permutation[ind]]
+                                for ind, bit in enumerate(self.cell_bits)}
+        # Empty boardcells of one row (as bits) -> indices of those boardcells, for each row
+        self.row_mask = (1 << grid_size) - 1
+        self.row_actions = tuple(tuple(tuple(r*grid_size + c for c in range(grid_size) if row_bits >> c & 1)
+                                       for row_bits in range(1 << grid_size))
+                                 for r in range(grid_size))
+        self.full_mask = sum(self.cell_bits)
+        self.top_mask = sum(self.cell_bits[:grid_size])
+        self.bottom_mask = sum(self.cell_bits[-grid_size:])
+        self.left_mask = sum(self.cell_bits[::grid_size])
+        self.right_mask = sum(self.cell_bits[grid_size-1::grid_size])
+
+
+@lru_cache(maxsize=None)
+def get_bit_geometry(grid_size):
+    return BitGeometry(grid_size)
+
+
+class BitBoard(Board):
+    def __init__(self, grid_size):
+        """
+        Board where a state is a tuple of two ints, (P1 pieces, P2 pieces), used as bitmasks.
+
+        Actions are the same indices as for Board, and states can be converted to and from
+        the ndarray-form with to_array and from_array.
+        """
+        Board.__init__(self, grid_size)
+        bit_geometry = get_bit_geometry(grid_size)
+        self.width = bit_geometry.width
+        self.cell_bits = bit_geometry.cell_bits
+        self.transposed_bits = bit_geometry.transposed_bits
+        self.row_mask = bit_geometry.row_mask
+        self.row_actions = bit_geometry.row_actions
+        self.full_mask = bit_geometry.full_mask
+        self.top_mask = bit_geometry.top_mask
+        self.bottom_mask = bit_geometry.bottom_mask
+        self.left_mask = bit_geometry.left_mask
+        self.right_mask = bit_geometry.right_mask
+
+    def to_array(self, state):
+        """
+        :param state: tuple of ints, (P1 pieces, P2 pieces)
+
+        :returns: ndarray, the same state as a grid
+        """
+        grid = np.zeros(self.grid_size*self.grid_size, dtype=int)
+        p1_pieces, p2_pieces = state
+        for ind, bit in enumerate(self.cell_bits):
+            if p1_pieces & bit:
+                grid[ind] = 1
+            elif p2_pieces & bit:
+                grid[ind] = -1
+        return grid
+
+    def from_array(self, grid):
+        """
+        :param grid: ndarray, grid in some state
+
+        :returns: tuple of ints, (P1 pieces, P2 pieces)
+        """
+        p1_pieces = 0
+        p2_pieces = 0
+        for ind, bit in enumerate(self.cell_bits):
+            if grid[ind] == 1:
+                p1_pieces |= bit
+            elif grid[ind] == -1:
+                p2_pieces |= bit
+        return p1_pieces, p2_pieces
+
+    def transpose(self, pieces):
+        transposed = 0
+        while pieces:
+            lowest_bit = pieces & -pieces
+            transposed |= self.transposed_bits[lowest_bit.bit_length()-1]
+            pieces ^= lowest_bit
+        return transposed
+
+    def flip_board(self, state):
+        # Transpose the board and let the players swap pieces
+        p1_pieces, p2_pieces = state
+        return self.transpose(p2_pieces), self.transpose(p1_pieces)
+
+    def get_initial_state(self):
+        return 0, 0
+
+    def get_possible_actions_from_state(self, state):
+        """
+        :param state: tuple of ints, (P1 pieces, P2 pieces)
+
+        :returns: list of ints, indices where a piece can be put, in increasing order
+        """
+        empty = self.full_mask & ~(state[0] | state[1])
+        actions = []
+        # Look up one row at a time
+        for row_actions in self.row_actions:
+            actions.extend(row_actions[empty & self.row_mask])
+            empty >>= self.width
+        return actions
+
+    def get_state_from_state_action(self, state, ind, player, verbose):
+        """
+        :param state: tuple of ints, (P1 pieces, P2 pieces)
+        :param ind: int, index of the boardcell to place a piece on
+        :param player: int, 1 for P1, -1 for P2
+        """
+        if verbose:
+            print('Player {} places piece on ({})'.format(
+                player, ind))
+        if player == 1:
+            return state[0] | self.cell_bits[ind], state[1]
+        return state[0], state[1] | self.cell_bits[ind]
+
+    def get_state_key(self, state):
+        # The tuple of bitmasks is hashable, and is its own key
+        return state
+
+    def dilate(self, pieces):
+        # Grow the mask to all six neighbours of each boardcell
+        width = self.width
+        return (pieces | (pieces << 1) | (pieces >> 1) | (pieces << width) | (pieces >> width)
+                | (pieces << (width-1)) | (pieces >> (width-1)))
+
+    def connects(self, pieces, start_mask, end_mask):
+        """
+        Flood fill from `start_mask` through `pieces` by dilation
+
+        :returns: boolean, True if the filled area reaches `end_mask`
+        """
+        if not (pieces & end_mask):
+            return False
+        reached = pieces & start_mask
+        while reached:
+            if reached & end_mask:
+                return True
+            grown = self.dilate(reached) & pieces
+            if grown == reached:
+                return False
+            reached = grown
+        return False
+
+    def get_winner(self, state):
+        """
+        :param state: tuple of ints, (P1 pieces, P2 pieces)
+
+        :returns: int, 1 if P1 has won, -1 if P2 has won, 0 if the game is not done
+        """
+        if self.connects(state[0], self.top_mask, self.bottom_mask):
+            return 1
+        if self.connects(state[1], self.left_mask, self.right_mask):
+            return -1
+        return 0
+
+    def print_board(self, state):
+        Board.print_board(self, self.to_array(state))
+
+    def display_board_graph(self, state):
+        Board.display_board_graph(self, self.to_array(state))
@@ -1,30 +1,47 @@
 import numpy as np
 import networkx as nx
 import matplotlib.pyplot as plt
+from UnionFind import UnionFind
+from Geometry import get_geometry
+
+
+class BoardState(np.ndarray):
+    """
+    Grid (ndarray) that carries the UnionFind-tracker and Zobrist key of the pieces on it.
+    Arrays derived from a BoardState (copies, flips, slices) do not keep them,
+    as their pieces may not match anymore.
+    """
+
+    def __array_finalize__(self, obj):
+        self.connectivity = None
+        self.key = None
 
 
 class Board:
     def __init__(self, grid_size):
         self.grid_size = grid_size
-        # Array holding edge-representation of grid
-        self.cell_neighbours = np.empty(grid_size*grid_size, dtype=list)
-        # self.cell_neighbours = np.empty((grid_size, grid_size), dtype=list)
-        for i in range(grid_size*grid_size):
-            # for j in range(grid_size):
-            self.cell_neighbours[i] = self.get_neighbour_list(i)
+        # Tables shared by all boards of this size
+        self.geometry = get_geometry(grid_size)
+        # Edge-representation of grid, neighbour indices of each boardcell
+        self.cell_neighbours = self.geometry.cell_neighbours
 
     def flip_board(self, board):
-        new_board = self.get_initial_state()
-        for r in range(self.grid_size):
-            for c in range(self.grid_size):
-                ind = r*self.grid_size + c
-                inverse_ind = c*self.grid_size + r
-                new_board[inverse_ind] = board[ind]*(-1)
-        return new_board
+        # Transpose the board and let the players swap pieces
+        return np.asarray(board)[self.geometry.flip_permutation]*(-1)
 
     def get_initial_state(self):
         # Values of each cell will be 0.
-        return np.zeros(self.grid_size*self.grid_size, dtype=int)
+        grid = np.zeros(self.grid_size*self.grid_size, dtype=int).view(BoardState)
+        grid.connectivity = UnionFind(self.geometry)
+        grid.key = 0
+        return grid
+
+    def to_array(self, grid):
+        # States are already ndarrays
+        return grid
+
+    def from_array(self, grid):
+        return np.asarray(grid)
 
     def get_possible_actions_from_state(self, grid):
         """
@@ -42,20 +59,70 @@ class Board:
         column: int, column to place piece on
         player: tuple, (1,0) for p1, (0,1) for p2. Also is the new value
         """
-        temp_grid = grid.copy()
+        # Copy as a plain ndarray, so the tracker of `grid` is not shared
+        temp_grid = np.array(grid).view(BoardState)
+        # Only track pieces placed on empty cells, overwriting a piece needs a full check
+        if temp_grid[ind] == 0:
+            tracker = getattr(grid, 'connectivity', None)
+            if tracker is None:
+                tracker = UnionFind.from_grid(self.geometry, temp_grid)
+            temp_grid.connectivity = tracker.copy()
+            temp_grid.key = self.get_state_key(grid) ^ self.geometry.zobrist_keys[player][ind]
         # Fill grid-cell with appropriate tuple
         temp_grid[ind] = player
+        if temp_grid.connectivity is not None:
+            temp_grid.connectivity.add_stone(temp_grid, ind, player)
+        else:
+            temp_grid.key = self.get_state_key(np.asarray(temp_grid))
         if verbose:
             print('Player {} places piece on ({})'.format(
                 player, ind))
         return temp_grid
 
+    def get_state_key(self, grid):
+        """
+        grid: ndarray, grid in some state
+
+        returns: int, Zobrist hash of the grid, equal grids have equal keys
+        """
+        # Grids made by get_state_from_state_action have their key updated with each piece
+        key = getattr(grid, 'key', None)
+        if key is not None:
+            return key
+        key = 0
+        zobrist_keys = self.geometry.zobrist_keys
+        for ind in np.flatnonzero(grid):
+            key ^= zobrist_keys[grid[ind]][ind]
+        return key
+
     def check_game_done(self, grid):
         """
         grid: ndarray, grid in some state
 
         returns: boolean, True if grid is winning state
         """
+        return self.get_winner(grid) != 0
+
+    def get_winner(self, grid):
+        """
+        grid: ndarray, grid in some state
+
+        returns: int, 1 if P1 has won, -1 if P2 has won, 0 if the game is not done
+        """
+        # Grids made by get_state_from_state_action know their winner
+        tracker = getattr(grid, 'connectivity', None)
+        if tracker is not None:
+            return tracker.winner
+        return self.get_grid_winner(grid)
+
+    def get_grid_winner(self, grid):
+        """
+        Winner of an ndarray grid, for any backend, found by searching for a path
+
+        grid: ndarray, grid in some state
+
+        returns: int, 1 if P1 has won, -1 if P2 has won, 0 if the game is not done
+        """
         # P1: path across rows (northeast to southwest), P2 path spanning columns (northwest to southeast)
         """
         Strategies:
@@ -75,7 +142,7 @@ class Board:
             if grid[i] == 1:
                 to_visit.append(i)
         if self.check_path(grid, to_visit, 1):
-            return True
+            return 1
         # Check for P2 - Upper left to lower right
         to_visit = []
         for i in range(self.grid_size):
@@ -83,8 +150,40 @@ class Board:
             if grid[i*self.grid_size] == -1:
                 to_visit.append(i*self.grid_size)
         if self.check_path(grid, to_visit, -1):
-            return True
-        return False
+            return -1
+        return 0
+
+    def check_game_done_batch(self, boards):
+        """
+        Finds the winners of many grids at once, by growing each players pieces on the
+        starting edge through neighbouring pieces until no grid changes
+
+        boards: ndarray, (N, grid_size*grid_size) grids in some state
+
+        returns: ndarray of ints (N, ), 1 if P1 has won, -1 if P2 has won, 0 if not done
+        """
+        boards = np.asarray(boards)
+        cells = self.geometry.cells
+        neighbour_index = self.geometry.neighbour_index
+        winners = np.zeros(len(boards), dtype=int)
+        for player, (start_edge, end_edge) in self.geometry.edge_masks.items():
+            # Extra column for the missing neighbours, which is never reached
+            reached = np.zeros((len(boards), cells+1), dtype=bool)
+            pieces = boards == player
+            reached[:, :cells] = pieces & start_edge
+            # Grids still growing without having reached the other side
+            active = np.flatnonzero(winners == 0)
+            while len(active):
+                current = reached[active]
+                grown = current[:, :cells] | (
+                    pieces[active] & current[:, neighbour_index].any(axis=2))
+                reached[active, :cells] = grown
+                still_growing = (grown != current[:, :cells]).any(axis=1)
+                not_across = ~(grown & end_edge).any(axis=1)
+                active = active[still_growing & not_across]
+            has_won = (reached[:, :cells] & end_edge).any(axis=1)
+            winners[has_won & (winners == 0)] = player
+        return winners
 
     def check_path(self, grid, to_visit, player):
         """
@@ -93,7 +192,7 @@ class Board:
         :param player: int, 1 for P1, -1 for P2
         """
         # Go through all to_visit-coordinates until none left
-        visited_cells = []
+        visited_cells = set()
         while to_visit:
             current_ind = to_visit.pop()
             # Check if current_cell is on the other side for P1 (row max)
@@ -105,36 +204,16 @@ class Board:
             # Find neighbouring cells to check for a path of `player`-cells
             neighbours = self.cell_neighbours[current_ind]
             for n_coords in neighbours:
-                # Dont go outside grid, dont go back to earlier visited cells
-                if (n_coords is not None) and (n_coords not in visited_cells):
+                # Dont go back to earlier visited cells
+                if n_coords not in visited_cells:
                     # Piece continuing the trail, add to to_visit
                     if grid[n_coords] == player:
                         to_visit.append(n_coords)
             # Make sure not to go back to current cell
-            visited_cells.append(current_ind)
+            visited_cells.add(current_ind)
         # Did not find a path
         return False
 
-    def get_neighbour_list(self, ind):
-        # Input: ind - index in 1d array holding board
-        neighbour_list = [None, None, None, None, None, None]
-        row = ind // self.grid_size
-        column = ind % self.grid_size
-        # List of coordinates for the neighbours of cell [row, column]
-        if (row > 0):
-            neighbour_list[0] = ind-self.grid_size
-            if (column < self.grid_size - 1):
-                neighbour_list[1] = ind-self.grid_size + 1
-        if (column > 0):
-            neighbour_list[3] = ind - 1
-        if (column < self.grid_size - 1):
-            neighbour_list[2] = ind + 1
-        if (row < self.grid_size - 1):
-            neighbour_list[5] = ind + self.grid_size
-            if (column > 0):
-                neighbour_list[4] = ind + self.grid_size - 1
-        return neighbour_list
-
     def print_board(self, grid):
         print('-------------------')
         for i in range(self.grid_size):
@@ -169,9 +248,8 @@ class Board:
         # Add edges between neighbours
         for i in range(self.grid_size*self.grid_size):
             for n in self.cell_neighbours[i]:
-                if n is not None:
-                    # Add edge between current node and neighbour node
-                    G.add_edge((i), (n))
+                # Add edge between current node and neighbour node
+                G.add_edge((i), (n))
         # Plot
         pos = nx.get_node_attributes(G, 'pos')
         labels = False
@@ -1,19 +1,50 @@
 from Board import Board
+from BitBoard import BitBoard
+from GameState import GameState
+from Renderer import BoardRenderer, export_game, export_game_in_background
 import matplotlib.animation
 import matplotlib.pyplot as plt
 
 
 class Environment:
-    def __init__(self, grid_size):
+    def __init__(self, grid_size, backend='array'):
         # grid_size: size of Board
-        self.game = Board(grid_size)
+        # backend: 'array' for ndarray-states, 'bitboard' for states of two bitmasks
+        self.grid_size = grid_size
+        self.backend = backend
+        self.game = {'array': Board,
+                     'bitboard': BitBoard}[backend](grid_size)
+        # BoardRenderer of draw_game, kept while it draws on the current axes
+        self.renderer = None
 
     def flip_state(self, state):
         """
         :returns: state where pieces of columns and rows are changed
         """
         return self.game.flip_board(state)
+
+    def flip_action(self, action):
+        """
+        :returns: action on the flipped board that matches `action` on the board
+        """
+        return self.game.geometry.flip_permutation[action]
   
+    def state_to_array(self, state):
+        """
+        :param state: board in the backends form
+
+        :returns: ndarray, board as used by the neural net
+        """
+        return self.game.to_array(state)
+
+    def array_to_state(self, grid):
+        """
+        :param grid: ndarray, board as used by the neural net
+
+        :returns: board in the backends form
+        """
+        return self.game.from_array(grid)
+
     def generate_initial_state(self):
         """
         :returns: initial state of self.game
@@ -25,10 +56,29 @@ class Environment:
         :param state: board, ndarray
         :param action: tuple with action to do
 
-        :returns: state
+        :returns: state, keeps track of its winner so check_game_done is O(1),
+            and of its key (see get_state_key)
         """
         return self.game.get_state_from_state_action(state, action, player, verbose)
 
+    def get_state_key(self, state):
+        """
+        :param state: board in the backends form
+
+        :returns: hashable key of the state (Zobrist hash for ndarray boards),
+            for use in dicts such as transposition tables and caches
+        """
+        return self.game.get_state_key(state)
+
+    def new_game_state(self, state, player):
+        """
+        :param state: board in the backends form
+        :param player: int, player to move
+
+        :returns: GameState, mutable copy of the game with play/undo
+        """
+        return GameState(self.game.geometry, self.state_to_array(state), player)
+
     def check_game_done(self, state):
         """
         :param state: board, ndarray
@@ -37,6 +87,30 @@ class Environment:
         """
         return self.game.check_game_done(state)
 
+    def get_winner(self, state):
+        """
+        :param state: board, ndarray
+
+        :returns: int, 1 if P1 won, -1 if P2 won, 0 if the game is not done
+        """
+        return self.game.get_winner(state)
+
+    def get_grid_winner(self, grid):
+        """
+        :param grid: ndarray, board in ndarray-form whatever the backend
+
+        :returns: int, 1 if P1 won, -1 if P2 won, 0 if the game is not done
+        """
+        return self.game.get_grid_winner(grid)
+
+    def check_game_done_batch(self, states):
+        """
+        :param states: ndarray, (N, grid_size*grid_size) boards
+
+        :returns: ndarray of ints, winner of each board (1, -1, or 0 if not done)
+        """
+        return self.game.check_game_done_batch(states)
+
     def get_possible_actions_from_state(self, state):
         """
         :param state: board, ndarray
@@ -64,16 +138,38 @@ class Environment:
         
         :param state: board, ndarray
         """
-        self.game.display_board_graph(state)
+        ax = plt.gca()
+        if self.renderer is None or self.renderer.ax is not ax:
+            self.renderer = BoardRenderer(self.grid_size, ax)
+        self.renderer.draw(self.state_to_array(state))
 
     def visualize(self, states, frame_delay):
         """
         Visualize a game given a list of states
         :param actions: A list of states (grids)
         """
+        fig = plt.gcf()
+        fig.clear()
+        # Layout is drawn once, frames only change node colours
+        renderer = BoardRenderer(self.grid_size, fig.add_subplot())
+
         def act_and_visualize(i):
-            self.game.display_board_graph(states[i])
+            return renderer.draw(self.state_to_array(states[i]))
 
-        fig = plt.gcf()
         ani = matplotlib.animation.FuncAnimation(fig, act_and_visualize, frames=(len(states)), interval=frame_delay, repeat=False)
         plt.show()
+
+    def export_game(self, states, path, frame_delay=500, background=True):
+        """
+        Saves a game to .gif, .mp4 or .png (strip of states) without showing it
+
+        :param states: list of states of the game
+        :param path: str, file to save to
+        :param background: bool, render in a separate process instead of waiting for it
+
+        :returns: the rendering process if background, else None
+        """
+        states = [self.state_to_array(state) for state in states]
+        if background:
+            return export_game_in_background(states, path, self.grid_size, frame_delay)
+        export_game(states, path, self.grid_size, frame_delay)
@@ -0,0 +1,68 @@
+import numpy as np
+from UnionFind import UndoableUnionFind
+
+
+class GameState:
+    def __init__(self, geometry, grid, player):
+        """
+        Mutable Hex game, changed in place by play and undo.
+        Nothing is allocated per move, which makes it suitable for rollouts.
+
+        :param geometry: Geometry, tables of the board size
+        :param grid: ndarray, grid to start from (copied)
+        :param player: int, player to move, 1 for P1, -1 for P2
+        """
+        self.geometry = geometry
+        self.grid = np.array(grid, dtype=int)
+        self.player = player
+        # Empty boardcells in no particular order, and the position of each in `empty`
+        self.empty = [int(ind) for ind in np.flatnonzero(self.grid == 0)]
+        self.position = [-1]*geometry.cells
+        for i, ind in enumerate(self.empty):
+            self.position[ind] = i
+        self.connectivity = UndoableUnionFind.from_grid(geometry, self.grid)
+        self.key = 0
+        for ind in np.flatnonzero(self.grid):
+            self.key ^= geometry.zobrist_keys[self.grid[ind]][ind]
+        # Moves played since creation, for undo
+        self.history = []
+
+    @property
+    def winner(self):
+        # 1 if P1 has won, -1 if P2 has won, 0 if the game is not done
+        return self.connectivity.winner
+
+    def play(self, move):
+        """
+        Places a piece for the player to move, and passes the turn
+
+        :param move: int, index of an empty boardcell
+        """
+        if self.grid[move] != 0:
+            raise ValueError('Boardcell {} is not empty'.format(move))
+        player = self.player
+        self.grid[move] = player
+        # Swap-remove `move` from the empty boardcells
+        i = self.position[move]
+        last = self.empty.pop()
+        if last != move:
+            self.empty[i] = last
+            self.position[last] = i
+        self.position[move] = -1
+        self.connectivity.add_stone(self.grid, move, player)
+        self.key ^= self.geometry.zobrist_keys[player][move]
+        self.history.append(move)
+        self.player = -player
+
+    def undo(self):
+        """
+        Takes back the last move played
+        """
+        move = self.history.pop()
+        player = -self.player
+        self.grid[move] = 0
+        self.position[move] = len(self.empty)
+        self.empty.append(move)
+        self.connectivity.undo_stone()
+        self.key ^= self.geometry.zobrist_keys[player][move]
+        self.player = player
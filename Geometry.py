@@ -0,0 +1,72 @@
+from functools import lru_cache
+import random
+import numpy as np
+
+
+class Geometry:
+    def __init__(self, grid_size):
+        """
+        Tables that only depend on the size of the board. Use get_geometry(grid_size),
+        which builds them once per grid size and shares them between all boards.
+        The arrays are read-only, as they are shared.
+        """
+        self.grid_size = grid_size
+        self.cells = grid_size*grid_size
+        # Neighbours of each boardcell, (index, position) with None for no neighbour
+        self.neighbour_lists = tuple(tuple(get_neighbour_list(grid_size, ind))
+                                     for ind in range(self.cells))
+        # Existing neighbours only
+        self.cell_neighbours = tuple(tuple(n for n in neighbours if n is not None)
+                                     for neighbours in self.neighbour_lists)
+        # Index array of neighbours, where missing neighbours point to the sentinel `cells`
+        self.neighbour_index = np.array([[self.cells if n is None else n for n in neighbours]
+                                         for neighbours in self.neighbour_lists])
+        self.rows, self.columns = np.divmod(np.arange(self.cells), grid_size)
+        # P1 connects top and bottom, P2 connects left and right
+        self.top_edge = self.rows == 0
+        self.bottom_edge = self.rows == grid_size - 1
+        self.left_edge = self.columns == 0
+        self.right_edge = self.columns == grid_size - 1
+        self.edge_masks = {1: (self.top_edge, self.bottom_edge),
+                           -1: (self.left_edge, self.right_edge)}
+        # (row, column) -> (column, row), flipping a board is board[flip_permutation]*(-1)
+        self.flip_permutation = self.columns*grid_size + self.rows
+        # Random 64-bit key per boardcell and player, a board hashes to the XOR of its pieces' keys
+        # Seeded by grid size, so keys are the same in every process
+        rng = random.Random(grid_size)
+        self.zobrist_keys = {player: tuple(rng.getrandbits(64) for _ in range(self.cells))
+                             for player in (1, -1)}
+        for array in (self.neighbour_index, self.rows, self.columns, self.top_edge,
+                      self.bottom_edge, self.left_edge, self.right_edge, self.flip_permutation):
+            array.flags.writeable = False
+
+
+@lru_cache(maxsize=None)
+def get_geometry(grid_size):
+    """
+    :param grid_size: int, size of the board
+
+    :returns: Geometry, shared by every caller asking for the same grid size
+    """
+    return Geometry(grid_size)
+
+
+def get_neighbour_list(grid_size, ind):
+    # Input: ind - index in 1d array holding board
+    neighbour_list = [None, None, None, None, None, None]
+    row = ind // grid_size
+    column = ind % grid_size
+    # List of coordinates for the neighbours of cell [row, column]
+    if (row > 0):
+        neighbour_list[0] = ind-grid_size
+        if (column < grid_size - 1):
+            neighbour_list[1] = ind-grid_size + 1
+    if (column > 0):
+        neighbour_list[3] = ind - 1
+    if (column < grid_size - 1):
+        neighbour_list[2] = ind + 1
+    if (row < grid_size - 1):
+        neighbour_list[5] = ind + grid_size
+        if (column > 0):
+            neighbour_list[4] = ind + grid_size - 1
+    return neighbour_list
@@ -1,5 +1,4 @@
 import numpy as np
-from tensorflow.keras.optimizers import Adagrad, Adam, SGD, RMSprop
 
 # NOTE: Player 1 is max-player
 """
@@ -8,6 +7,10 @@ choices by their respective agents. ANETs will not do any learning during the TO
 """
 # Displaying games
 visualize = False
+# If set, visualized games are saved (in a background process) instead of shown, e.g. './games/game_'
+export_path = None
+# File type of saved games, '.gif', '.mp4' or '.png' (strip of all states)
+export_format = '.gif'
 
 # What program to run, 'Test': 'Testspace', 'M': 'MCTS', 'T': 'TOPP', 'P': 'Play against'
 run_key = 'T'
@@ -15,11 +18,40 @@ run_key = 'T'
 # Hex game, [3,10]
 grid_size = 5
 
+# Representation of board states during self-play, 'array' (ndarray) or 'bitboard' (two int bitmasks)
+board_backend = 'array'
+
 # Number of games in a batch
 G = 200
 
 # Number of simulations (and therefore rollouts) for each move
 M = 10
+# Seconds each player may search during a game, shared over its moves (M is then the most simulations
+# per move, can be None), None for M simulations per move
+time_per_game = None
+# Processes searching each move in parallel (root parallelization, their root statistics are merged), 1 for none
+num_workers = 1
+# Keep the search tree of the played move for the next move, instead of starting over
+reuse_tree = False
+# Nodes kept in the transposition table (states reached by different move orders share a node), 0 for none
+transposition_table_size = 0
+
+# Tree policy, 'uct' or 'puct' (exploration weighted by ANETs probabilities, one inference per expanded node)
+selection = 'uct'
+
+# Bytes the expanded nodes of a search tree may use, None for no limit
+max_tree_memory = None
+# When the tree is full, 'evict' (release the least visited subtrees, not with a transposition table) or 'stop' expanding
+tree_memory_policy = 'evict'
+
+# Stop the search of a move when the most visited action can not be overtaken in the simulations left
+# (the most visited action is then played, instead of the one with the highest value)
+early_stop = False
+# Also stop when the best action's value is this many standard errors above the others (e.g. 2.58), None for never
+early_stop_confidence = None
+
+# Time the phases of the searches (tree traversal, expansion, evaluation, backpropagation) and print them per game
+profile = False
 
 # Number of ANETs to be cached for a TOPP - starting with an untrained net prior to episode 1
 # NOTE: 1 < num_caches <= G+1
@@ -52,11 +84,15 @@ hidden_layers = [128, 64]+[grid_size**2]
 # Activation functions (linear, sigmoid, tanh, relu)
 activations = ['linear', 'relu']+['softmax']
 
-# Optimizer (adagrad, Stochastic Gradient Descent (SGD), RMSProp, and Adam)
-optimizer = {'adam': Adam(learning_rate=lr),
-             'adagrad': Adagrad(learning_rate=lr),
-             'sgd': SGD(learning_rate=lr),
-             'rmsprop': RMSprop(learning_rate=lr)}['adam']
+# Add a value output (expected winner of a state, trained on the results of self-play games) next to the policy
+value_head = False
+
+# Optimizer (adagrad, Stochastic Gradient Descent (SGD), RMSProp, and Adam): 'adagrad', 'sgd', 'rmsprop' or 'adam'
+optimizer = 'adam'
+
+
+# Action distributions kept for positions seen before (cleared when the weights change), 0 for no cache
+policy_cache_size = 0
 
 
 ##### OTHER PARAMETERS #####
@@ -64,6 +100,13 @@ optimizer = {'adam': Adam(learning_rate=lr),
 # ANET vs random rollout on leaf evaluation (speed up)
 random_leaf_eval_fraction = 0.96
 random_leaf_eval_decay =  0.8
+# Random rollouts per random leaf evaluation, done together and averaged (lower variance per simulation)
+rollouts_per_leaf = 1
+# ANET leaf evaluations done together (one batched forward pass per rollout move), 1 for one at a time
+leaf_batch_size = 1
+
+# ANET leaf evaluation, 'rollout' (play the game out with ANET) or 'value' (one value inference, needs value_head)
+leaf_evaluation = 'rollout'
 
 # Player to start, P1: 1, P2: -1. Always use 1
 P = 1
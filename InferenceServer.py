@@ -0,0 +1,193 @@
+import asyncio
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+
+def sample_action(action_probabilities):
+    """
+    Randomly pick action, weighted by the probabilities (illegal actions have probability 0)
+    """
+    return np.random.choice(len(action_probabilities), p=action_probabilities)
+
+
+class InferenceServer:
+    def __init__(self, neural_net, max_batch_size=64, max_latency=0.002):
+        """
+        Collects policy requests from many searches (threads, asyncio tasks or processes) and
+        runs them through the neural net together. A batch is run when it has `max_batch_size`
+        rows, or when the oldest request has waited `max_latency` seconds.
+
+        Has the same get_action_distributions and default_policy as NeuralNet, so it can be
+        given to MCTS in place of the neural net. Processes use a client from connect().
+
+        :param neural_net: NeuralNet, only used by the server thread
+        :param max_batch_size: int, rows per forward pass
+        :param max_latency: float, seconds a request may wait for more requests
+        """
+        self.neural_net = neural_net
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        # (states, players, future, time of submit), None to stop
+        self.requests = queue.Queue()
+        # Requests from client processes, (client id, states, players), answered with
+        # (True, action probabilities) or (False, exception). Arrays are pickled through the queues
+        self.process_requests = multiprocessing.get_context('spawn').Queue()
+        self.response_queues = []
+        # Statistics
+        self.num_requests = 0
+        self.num_batches = 0
+        self.num_rows = 0
+        self.total_latency = 0
+        self.max_queue_latency = 0
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+        self.process_thread = threading.Thread(target=self.serve_processes, daemon=True)
+        self.process_thread.start()
+
+    def submit(self, states, players):
+        """
+        :param states: ndarray, (N, cells) boards
+        :param players: ndarray, (N, ) player to move in each board
+
+        :returns: Future, with (N, cells) action probabilities as result
+        """
+        states = np.asarray(states)
+        players = np.asarray(players)
+        if states.ndim != 2 or players.shape != (len(states), ):
+            raise ValueError('Expected (N, cells) states and (N, ) players, got {} and {}'.format(
+                states.shape, players.shape))
+        future = Future()
+        self.requests.put((states, players, future, time.perf_counter()))
+        return future
+
+    async def get_action_distributions_async(self, states, players):
+        return await asyncio.wrap_future(self.submit(states, players))
+
+    def get_action_distributions(self, states, players):
+        return self.submit(states, players).result()
+
+    def default_policy(self, possible_actions, state, player):
+        return sample_action(self.get_action_distributions(np.asarray(state)[None], [player])[0])
+
+    def connect(self):
+        """
+        Makes a client for a process. Must be called before the process is started,
+        and the client passed to it.
+
+        :returns: InferenceClient
+        """
+        response_queue = multiprocessing.get_context('spawn').Queue()
+        self.response_queues.append(response_queue)
+        return InferenceClient(self.process_requests, response_queue, len(self.response_queues)-1)
+
+    def serve_processes(self):
+        # Passes requests from client processes on to the batching thread
+        while True:
+            request = self.process_requests.get()
+            if request is None:
+                return
+            client_id, states, players = request
+            try:
+                future = self.submit(states, players)
+            except ValueError as e:
+                future = Future()
+                future.set_exception(e)
+            future.add_done_callback(
+                lambda f, response_queue=self.response_queues[client_id]: respond(response_queue, f))
+
+    def serve(self):
+        # Runs batches until close
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            batch = [request]
+            rows = len(request[0])
+            deadline = request[3] + self.max_latency
+            # Wait for more requests until the batch is full or the oldest has waited long enough
+            while rows < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                try:
+                    request = self.requests.get(timeout=timeout) if timeout > 0 else self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    self.requests.put(None)
+                    break
+                batch.append(request)
+                rows += len(request[0])
+            self.run_batch(batch)
+
+    def run_batch(self, batch):
+        start_time = time.perf_counter()
+        try:
+            # Fails if the requests have boards of different sizes, then only this batch fails
+            states = np.concatenate([states for states, _, _, _ in batch])
+            players = np.concatenate([players for _, players, _, _ in batch])
+            action_probabilities = self.neural_net.get_action_distributions(states, players)
+        except Exception as e:
+            for _, _, future, _ in batch:
+                future.set_exception(e)
+            return
+        self.num_batches += 1
+        self.num_rows += len(states)
+        row = 0
+        for states, _, future, submit_time in batch:
+            latency = start_time - submit_time
+            self.num_requests += 1
+            self.total_latency += latency
+            self.max_queue_latency = max(self.max_queue_latency, latency)
+            future.set_result(action_probabilities[row:row+len(states)])
+            row += len(states)
+
+    def get_stats(self):
+        """
+        :returns: dict, number of requests and batches, mean batch size (rows),
+            mean and max seconds requests waited before their batch was run
+        """
+        return {'requests': self.num_requests,
+                'batches': self.num_batches,
+                'mean_batch_size': self.num_rows/max(self.num_batches, 1),
+                'mean_queue_latency': self.total_latency/max(self.num_requests, 1),
+                'max_queue_latency': self.max_queue_latency}
+
+    def close(self):
+        self.requests.put(None)
+        self.process_requests.put(None)
+        self.thread.join()
+        self.process_thread.join()
+
+
+def respond(response_queue, future):
+    # Sends the result of a request to its client process, or the error if the batch failed
+    # (as a RuntimeError, the exception itself may not be picklable)
+    error = future.exception()
+    if error is None:
+        response_queue.put((True, future.result()))
+    else:
+        response_queue.put((False, RuntimeError('Inference failed: {!r}'.format(error))))
+
+
+class InferenceClient:
+    def __init__(self, request_queue, response_queue, client_id):
+        """
+        Used in another process to send requests to an InferenceServer, made by InferenceServer.connect.
+        Requests from one client are answered in order, so a client must only be used by one thread.
+        """
+        self.request_queue = request_queue
+        self.response_queue = response_queue
+        self.client_id = client_id
+
+    def get_action_distributions(self, states, players):
+        self.request_queue.put((self.client_id, np.asarray(states), np.asarray(players)))
+        ok, response = self.response_queue.get()
+        if not ok:
+            raise response
+        return response
+
+    def default_policy(self, possible_actions, state, player):
+        return sample_action(self.get_action_distributions(np.asarray(state)[None], [player])[0])
@@ -1,161 +1,581 @@
+import math
+import time
 import numpy as np
 from Node import Node
+from NodePool import NodePool
+from SearchStats import SearchStats
+from TranspositionTable import TranspositionTable
 import random
 from GlobalConstants import grid_size, p1, p2
 
 class MCTS:
-    def __init__(self, env, neural_net, random_leaf_eval_fraction):
+    def __init__(self, env, neural_net, random_leaf_eval_fraction, rollouts_per_leaf=1,
+                 transposition_table_size=0, leaf_batch_size=1, leaf_evaluation='rollout',
+                 selection='uct', max_tree_memory=None, tree_memory_policy='evict',
+                 early_stop=False, early_stop_confidence=None, profile=False):
         self.c = 1
-        # Dict to keep different values for nodes
-        self.states = {}
+        # 'uct', or 'puct' (exploration weighted by ANETs probabilities, evaluated once per node)
+        self.selection = selection
+        # Nodes by state key, so transpositions share one node. 0 for a plain tree
+        self.transpositions = None
+        if transposition_table_size:
+            self.transpositions = TranspositionTable(transposition_table_size)
         self.sim_env = env
         self.neural_net = neural_net
         self.random_leaf_eval_fraction = random_leaf_eval_fraction
+        # Random rollouts done (vectorized) for each random leaf evaluation, their mean is backed up
+        self.rollouts_per_leaf = rollouts_per_leaf
+        # ANET leaf evaluations collected before evaluating them together, 1 evaluates each at once.
+        # Paths to collected leaves get a virtual loss, so the next selections try other paths
+        self.leaf_batch_size = leaf_batch_size
+        self.virtual_loss = 1
+        # 'rollout': ANET leaf evaluations play the game out with the policy,
+        # 'value': they use the value head of ANET, one inference per leaf
+        self.leaf_evaluation = leaf_evaluation
+        if leaf_evaluation not in ('rollout', 'value'):
+            raise ValueError('Unknown leaf evaluation: {}'.format(leaf_evaluation))
+        # The net of a worker process is set later (ParallelMCTS), and is checked in the main process
+        if leaf_evaluation == 'value' and neural_net is not None and \
+                not getattr(neural_net, 'value_head', False):
+            raise ValueError("leaf_evaluation 'value' needs a neural net with a value head (value_head = True)")
+        # Search tree kept between moves (see advance), with the key and player of its state
+        self.root = None
+        self.root_key = None
+        self.root_player = None
+        # Edge-values of the expanded nodes, limited to max_tree_memory bytes (None for no limit).
+        # When it is full, 'evict' releases the least visited subtree beside the current path
+        # (only without a transposition table, where a subtree has no other parents), and
+        # 'stop' evaluates leaves without expanding them
+        self.pool = NodePool(env.grid_size**2, max_tree_memory)
+        self.tree_memory_policy = tree_memory_policy
+        # Leaves waiting for batched ANET evaluation, (path, grid, player to move)
+        self.pending_leaves = []
+        # Pool statistics of the last call to simulate
+        self.memory_stats = None
+        # Stop searching when the most visited root action has more visits than any other
+        # can catch up with in the simulations left. The most visited action is then the one
+        # chosen (see get_simulated_action), so the stop does not change the result
+        self.early_stop = early_stop
+        # Or when the value of the best root action is this many standard errors above every
+        # other action (e.g. 2.58), None to never stop on the values
+        self.early_stop_confidence = early_stop_confidence
+        # Simulations between checks of the early stop rules
+        self.early_stop_interval = 10
+        # Simulations done by the last call to simulate, and simulations not needed (early stop)
+        self.simulations_done = 0
+        self.simulations_saved = 0
+        # Time per phase and counts of the last call to simulate (a SearchStats), if profile is set
+        self.profile = profile
+        self.stats = None
 
-    def simulate(self, player_number: tuple, M: int, init_state):
-        # Create a node from begin-state
-        # NOTE: Everything is reset each round
-        node = Node(init_state, parent=None, is_final=False, is_root=True)
-        for i in range(M):
+    def simulate(self, player_number: tuple, M: int, init_state, time_budget=None):
+        """
+        Searches from `init_state` for `M` simulations, or until `time_budget` seconds have
+        passed (whichever comes first), or until the best action is settled (see is_decided).
+        M can be None when a time budget is given. The number of simulations done is kept in
+        simulations_done, and the number left out by an early stop in simulations_saved.
+
+        :returns: (best action, normalized visit counts of all actions)
+        """
+        # The clock is read once per simulation
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        if M is None:
+            M = math.inf
+        # Continue on the tree from earlier moves if advance has been called with the moves
+        # played since, otherwise create a node from begin-state
+        key = self.sim_env.get_state_key(init_state)
+        if self.root is None or self.root_key != key or self.root_player != player_number:
+            # Statistics of earlier searches are only used through advance (also with a
+            # transposition table), so the visit counts are those of this search
+            if self.root is not None:
+                self.root.is_root = False
+                if self.transpositions is None:
+                    self.release_tree(self.root)
+            if self.transpositions is not None:
+                self.transpositions.clear()
+                self.pool.reset()
+            self.root = Node(init_state, is_final=False)
+            if self.transpositions is not None:
+                self.transpositions.put(key, self.root)
+            self.root.is_root = True
+            self.root_key = key
+            self.root_player = player_number
+        node = self.root
+        self.pool.reset_peak()
+        # Mutable game, moves are played on it while going down the tree and undone after
+        game = self.sim_env.new_game_state(init_state, player_number)
+        self.pending_leaves = []
+        # Only timed when profiling, the checks of `stats` are all that is left otherwise
+        stats = self.stats = SearchStats() if self.profile else None
+        clock = time.perf_counter_ns
+        i = 0
+        # At least one simulation, so the root has statistics to choose from
+        while i < M and (deadline is None or i == 0 or time.perf_counter() < deadline):
+            if stats:
+                start = clock()
             self.p_num = player_number
+            # (node, action slot) of every step from the root, for backpropagation
+            self.path = []
             # 1. Follow tree policy to leaf node
             # Note: leaf-node may be a final state, but not necessary
-            leaf_node = self.traverse_tree(node)
+            leaf_node = self.traverse_tree(node, game)
+            if stats:
+                traversed = clock()
+                stats.traverse_ns += traversed - start
 
             # 2. When leaf-node is found, expand the leaf to get all children and return one of them (or `node` if it is a final state)
-            leaf_node = self.expand_leaf_node(leaf_node)
+            leaf_node = self.expand_leaf_node(leaf_node, game)
+            if stats:
+                expanded = clock()
+                stats.expand_ns += expanded - traversed
+                stats.total_depth += len(self.path)
 
             # 3. Leaf evaluation
-            if random.random() <= self.random_leaf_eval_fraction:
+            random_evaluation = random.random() <= self.random_leaf_eval_fraction
+            if random_evaluation:
                 # Use random leaf_eval
-                self.rollout_evaluation = self.default_policy
+                eval_value = self.fill_rollout(game)
+            elif self.leaf_batch_size > 1 and not game.winner:
+                # Use ANETs leaf_eval later, together with other leaves
+                self.add_virtual_loss(self.path, player_number, 1)
+                self.pending_leaves.append((self.path, game.grid.copy(), game.player))
+                eval_value = None
+            elif self.leaf_evaluation == 'value':
+                # Use ANETs value of the leaf
+                eval_value = self.evaluate_leaf_value(game)
             else:
                 # Use ANETs leaf_eval
                 self.rollout_evaluation = self.neural_net.default_policy
-            eval_value = self.evaluate_leaf(leaf_node)
+                eval_value = self.evaluate_leaf(game)
+            if stats:
+                evaluated = clock()
+                if random_evaluation:
+                    stats.random_eval_ns += evaluated - expanded
+                else:
+                    stats.anet_eval_ns += evaluated - expanded
 
             # 4. Backprop
-            self.backpropagate(leaf_node, eval_value)
+            if eval_value is not None:
+                self.backpropagate(self.path, eval_value)
+            if stats:
+                backpropagated = clock()
+                stats.backprop_ns += backpropagated - evaluated
+            if len(self.pending_leaves) >= self.leaf_batch_size:
+                self.evaluate_pending_leaves(self.pending_leaves, player_number)
+                self.pending_leaves = []
+                if stats:
+                    stats.anet_eval_ns += clock() - backpropagated
+            # Back to the root state
+            while game.history:
+                game.undo()
+            i += 1
             #input('...press any key to do next simulation\n\n')
+            if i % self.early_stop_interval == 0 and not self.pending_leaves and \
+                    self.is_decided(node, player_number, M - i):
+                break
+        if self.pending_leaves:
+            if stats:
+                start = clock()
+            self.evaluate_pending_leaves(self.pending_leaves, player_number)
+            self.pending_leaves = []
+            if stats:
+                stats.anet_eval_ns += clock() - start
+        if stats:
+            stats.simulations = i
+        self.simulations_done = i
+        self.simulations_saved = M - i if M < math.inf else 0
+        self.memory_stats = self.pool.get_stats()
         action_distributions = self.get_action_distribution(node)
         return self.get_simulated_action(node, player_number), action_distributions
 
+    def is_decided(self, node, player_num, remaining):
+        """
+        Early stop rules, see early_stop and early_stop_confidence
+
+        :param node: Node, the root
+        :param player_num: int, player to move at the root
+        :param remaining: int or inf, simulations left of the budget
+
+        :returns: True if more simulations can not (or are very unlikely to) change the best action
+        """
+        if node.is_leaf or not (self.early_stop or self.early_stop_confidence is not None):
+            return False
+        if len(node.N_sa) == 1:
+            return True
+        if self.early_stop:
+            second, first = np.partition(node.N_sa, -2)[-2:]
+            if first - second > remaining:
+                return True
+        if self.early_stop_confidence is not None:
+            values = node.Q_sa*player_num
+            visits = np.maximum(node.N_sa, 1)
+            # Results are 1 or -1, so the variance of a result is at most (1 - Q**2). 1/N is added,
+            # so a few equal results are not taken as certain
+            errors = self.early_stop_confidence*np.sqrt((1 - node.Q_sa**2 + 1/visits)/visits)
+            # Nothing is known about unvisited actions
+            upper = np.where(node.N_sa > 0, values + errors, 1)
+            best = np.argmax(np.where(node.N_sa > 0, values, -np.inf))
+            upper[best] = -np.inf
+            if values[best] - errors[best] > np.max(upper):
+                return True
+        return False
+
+    def advance(self, action):
+        """
+        Moves the root of the search tree to the child of `action`, so the next call to
+        simulate (from the resulting state) continues with the statistics found so far.
+        The rest of the old tree is released.
+
+        :param action: int, action played from the current root state
+        """
+        old_root = self.root
+        if old_root is None:
+            return
+        child_node = None
+        if not old_root.is_leaf:
+            action_indices = np.flatnonzero(old_root.actions == action)
+            if len(action_indices):
+                child_node = old_root.children[action_indices[0]]
+        if child_node is None:
+            # Action has not been explored, start over on the next search
+            self.root = None
+            return
+        next_state = self.sim_env.generate_child_state_from_action(
+            old_root.name, action, self.root_player)
+        # Cut the child loose, so the old root and the siblings can be freed (with a
+        # transposition table, nodes that are also below the child are kept, see release_unreachable)
+        if self.transpositions is None:
+            old_root.children[action_indices[0]] = None
+            self.release_tree(old_root)
+        old_root.is_root = False
+        child_node.is_root = True
+        child_node.name = next_state
+        self.root = child_node
+        self.root_key = self.sim_env.get_state_key(next_state)
+        self.root_player = self.root_player ^ (p1 ^ p2)
+        if self.transpositions is not None:
+            self.release_unreachable()
+
+    def reset(self):
+        """
+        Drops the search tree and the transposition table, the next search starts from scratch
+        """
+        self.root = None
+        if self.transpositions is not None:
+            self.transpositions.clear()
+        self.pool.reset()
+
+    def release_tree(self, node):
+        """
+        Gives the rows of `node` and the nodes below it back to the pool. Only for trees
+        (no transposition table), where no other node leads into the subtree.
+        """
+        nodes = [node]
+        while nodes:
+            node = nodes.pop()
+            if node.slot is not None:
+                self.pool.release(node.slot)
+                node.slot = None
+            if node.children is not None:
+                nodes.extend(child for child in node.children if child is not None)
+                node.children = None
+
+    def release_unreachable(self):
+        """
+        With a transposition table, where release_tree can not be used, gives the rows of the
+        nodes that can no longer be reached from the root back to the pool, and drops those
+        nodes from the table. Called when the root changes.
+        """
+        reachable = set()
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            if id(node) in reachable:
+                continue
+            reachable.add(id(node))
+            if node.children is not None:
+                nodes.extend(child for child in node.children if child is not None)
+        self.transpositions.retain(reachable)
+        for slot, node in self.pool.get_owners():
+            if id(node) not in reachable:
+                self.pool.release(slot)
+                node.slot = None
+                node.children = None
+
+    def evict(self):
+        """
+        Releases the least visited expanded subtree next to the current path, as close to the root
+        as possible. Its statistics stay on the edge from its parent, and a new node is made if it
+        is chosen again.
+
+        :returns: True if a subtree was released
+        """
+        for node, action_index in self.path:
+            candidates = [i for i, child in enumerate(node.children)
+                          if i != action_index and child is not None and not child.is_leaf]
+            if candidates:
+                i = min(candidates, key=lambda i: node.N_sa[i])
+                self.release_tree(node.children[i])
+                node.children[i] = None
+                return True
+        return False
+
     def get_action_distribution(self, node):
         # Returns normalized action distribution
-        action_distributions = np.zeros(len(node.name))
+        action_distributions = np.zeros(self.sim_env.grid_size**2)
         # For all possible actions, add corresponding number of times action has been taken
-        np.put(action_distributions, list(node.N_sa.keys()), list(node.N_sa.values()))
+        action_distributions[node.actions] = node.N_sa
         # Normalize
         action_distributions /= np.sum(action_distributions)
         return action_distributions
 
 
-    def tree_policy(self, node, combine_function, arg_function, best_value):
-        # Using UCT to find best action in the tree
+    def tree_policy(self, node, p_num):
+        # Using UCT (or PUCT) to find best action in the tree
         # :returns: index of best action in nodes actions
-        # inout: node, possible actions from state,arg_function is either max or min, combine_function is either sum or minus
-        best_action_index = None
-        for i, a in enumerate(node.actions):
-            u = self.c*np.sqrt(np.log(node.N_s)/(1+node.N_sa[a]))
-            action_value = node.Q_sa[a]
-            possible_best = combine_function(action_value, u)
-            best_value = arg_function(possible_best, best_value)
-            if best_value == possible_best:
-                best_action_index = i
-        return best_action_index
-
-    def traverse_tree(self, root_node):
-        # Returns leafnode
+        # Q-values are seen from the players perspective (sign flip for the min player), so the
+        # best action is the one with the highest value plus exploration bonus
+        if node.priors is not None:
+            u = self.c*node.priors*math.sqrt(node.N_s)/(1+node.N_sa)
+        else:
+            u = self.c*np.sqrt(math.log(node.N_s)/(1+node.N_sa))
+        values = node.Q_sa*p_num + u
+        # Last of the equally good actions, as when comparing one action at a time
+        return len(values) - 1 - np.argmax(values[::-1])
+
+    def traverse_tree(self, root_node, game):
+        # Returns leafnode, with its state played on `game`
         node = root_node
         # Traverse until node is a leaf-node or a final state
         while not (node.is_leaf or node.is_final_state):
-            combine_func, arg_func, best_value = self.get_minimax_functions(
-                self.p_num)
-            action_index = self.tree_policy(
-                node, combine_func, arg_func, best_value)
-            # Set chosen action for traversing later
-            node.set_action_done(node.actions[action_index])
-            # Get child-node with same index as best action
-            node = node.children[action_index]
+            action_index = self.tree_policy(node, self.p_num)
+            # Keep chosen action for backpropagation
+            self.path.append((node, action_index))
+            game.play(node.actions[action_index])
             # Next players turn
             self.p_num = self.p_num ^ (p1 ^ p2)
+            child_node = node.children[action_index]
+            if child_node is None:
+                # First time the action is chosen, so the child is created (or found, if the
+                # state was reached by other moves)
+                child_node = self.get_node(game)
+                node.add_child(action_index, child_node)
+            node = child_node
         return node
 
-    def expand_leaf_node(self, node):
+    def expand_leaf_node(self, node, game):
         # Expand if the node is not a final state
         if not node.is_final_state:
-            # Get all action from node, and the resulting states
-            edges = self.sim_env.get_possible_actions_from_state(node.name)
-            child_nodes = []
-            for e in edges:
-                # Get the child state action `e` would result in
-                child_state = self.sim_env.generate_child_state_from_action(
-                    node.name, e, self.p_num)
-                is_final = self.sim_env.check_game_done(child_state)
-                # Add child node, with parent `node`
-                child_node = Node(child_state, parent=node, is_final=is_final)
-                child_nodes.append(child_node)
-            # Add all children and actions for node
-            node.set_children(edges, child_nodes)
+            slot = self.pool.allocate(node)
+            if slot is None and self.tree_memory_policy == 'evict' and self.transpositions is None:
+                # Paths of pending leaves must not be released before their results are added
+                if self.pending_leaves:
+                    self.evaluate_pending_leaves(self.pending_leaves, self.root_player)
+                    self.pending_leaves = []
+                if self.evict():
+                    slot = self.pool.allocate(node)
+            if slot is None and not node.is_root:
+                # Tree is full, evaluate the leaf as it is
+                return node
+            # Get all action from node (in increasing order), children are made when chosen
+            edges = sorted(game.empty)
+            arrays = priors = None
+            if slot is not None:
+                actions, N_sa, Q_sa, E_t, priors = self.pool.get_arrays(slot, len(edges))
+                arrays = (actions, N_sa, Q_sa, E_t)
+            # The root is always expanded, with its own arrays if the pool is full
+            node.set_actions(edges, arrays)
+            node.slot = slot
+            # Take the last action, as the value of all actions are unknown
+            action_index = len(edges)-1
+            if self.selection == 'puct':
+                node.priors = self.get_priors(game, node.actions)
+                if priors is not None:
+                    priors[:] = node.priors
+                    node.priors = priors
+                # Take the most probable action
+                action_index = len(edges) - 1 - np.argmax(node.priors[::-1])
+            self.path.append((node, action_index))
+            game.play(edges[action_index])
             # Moving on to a new layer, so next players turn
             self.p_num = self.p_num ^ (p1 ^ p2)
-            # Set action_done to the last action, as the last child is returned
-            node.set_action_done(edges[-1])
-            # Returning last child node, as the value of all child_nodes as unknown
+            child_node = self.get_node(game)
+            node.add_child(action_index, child_node)
             return child_node
         else:
             # Node is a leaf-node already (final state), so return it
             return node
 
+    def get_priors(self, game, actions):
+        """
+        :param game: GameState, in the state of the node being expanded
+        :param actions: ndarray, the actions of the node
+
+        :returns: ndarray, ANETs probability of each action (uniform without a neural net)
+        """
+        if self.neural_net is None:
+            return np.full(len(actions), 1/len(actions))
+        if self.stats:
+            self.stats.nn_calls += 1
+        action_probabilities = self.neural_net.get_action_distributions(
+            game.grid[None], np.array([game.player]))[0]
+        return action_probabilities[actions]
+
+    def get_node(self, game):
+        """
+        :param game: GameState, in the state of the node
+
+        :returns: Node for the state, shared with other paths through the transposition table
+        """
+        if self.transpositions is None:
+            return Node(None, is_final=game.winner != 0)
+        node = self.transpositions.get(game.key)
+        if node is None:
+            node = Node(None, is_final=game.winner != 0)
+            self.transpositions.put(game.key, node)
+        return node
+
     def default_policy(self, possible_actions, state, p_num):
         # Using uniform distribution to get an action
         # All parameters except `possible_actions` are dummy-parameters, to match ANETs parameters
         random_index = np.random.randint(len(possible_actions))
         return possible_actions[random_index]
 
-    def evaluate_leaf(self, node):
-        # Do rollout on `node` to get value
-        state = node.name
-        while not self.sim_env.check_game_done(state):
-            possible_actions = self.sim_env.get_possible_actions_from_state(
-                state)
-            action = self.rollout_evaluation(possible_actions, state, self.p_num)
-            state = self.sim_env.generate_child_state_from_action(
-                state, action, self.p_num)
-            self.p_num = self.p_num ^ (p1 ^ p2)
+    def fill_rollout(self, game):
+        """
+        Uniformly random rollout from the state of `game`, done by filling the board in one go.
+
+        Hex has no draws and a filled board has exactly one winner, and a player that has
+        won stays the winner when more pieces are added. A random playout therefore ends
+        with the winner of the board where the player to move gets a random half (rounded
+        up) of the empty cells, and the board only needs to be checked once.
+
+        With rollouts_per_leaf > 1, that many boards are filled and checked together.
+
+        :returns: 1 if P1 wins the rollout, -1 if P2 wins, or the mean over all rollouts
+        """
+        if game.winner:
+            return self.sim_env.get_environment_value(game.winner)
+        grid = game.grid.copy()
+        empty_cells = np.array(game.empty)
+        if self.stats:
+            self.stats.rollout_steps += len(empty_cells)*self.rollouts_per_leaf
+        if self.rollouts_per_leaf == 1:
+            np.random.shuffle(empty_cells)
+            # Players alternate, starting with the player to move
+            grid[empty_cells[0::2]] = self.p_num
+            grid[empty_cells[1::2]] = self.p_num ^ (p1 ^ p2)
+            return self.sim_env.get_environment_value(self.sim_env.get_grid_winner(grid))
+        boards = np.tile(grid, (self.rollouts_per_leaf, 1))
+        # A random order of the empty cells for each rollout, even turns go to the player to move
+        turns = np.argsort(np.random.random((self.rollouts_per_leaf, len(empty_cells))), axis=1)
+        boards[:, empty_cells] = np.where(turns % 2 == 0, self.p_num, self.p_num ^ (p1 ^ p2))
+        # Winners are 1 and -1, the same as the environment values
+        return np.mean(self.sim_env.check_game_done_batch(boards))
+
+    def evaluate_leaf(self, game):
+        # Do rollout on the state of `game` to get value, in place (undone by simulate)
+        while not game.winner:
+            action = self.rollout_evaluation(game.empty, game.grid, game.player)
+            game.play(action)
+            if self.stats:
+                self.stats.rollout_steps += 1
+                self.stats.nn_calls += 1
         # Player that did last move is the final player
+        self.p_num = game.player
         final_player = self.p_num ^ (p1 ^ p2)
         eval_value = self.sim_env.get_environment_value(final_player)
         return eval_value
 
+    def evaluate_leaf_value(self, game):
+        # Value of the state of `game` from the value head, no rollout
+        if game.winner:
+            return self.sim_env.get_environment_value(game.winner)
+        if self.stats:
+            self.stats.nn_calls += 1
+        return self.neural_net.get_values(game.grid[None], np.array([game.player]))[0]
+
+    def evaluate_leaves(self, grids, players):
+        """
+        ANET rollouts from several leaves at once, one batched forward pass per move
+
+        :param grids: ndarray, (N, cells) states of the leaves, none of them final
+        :param players: ndarray of ints, (N, ) player to move in each state
+
+        :returns: ndarray of ints (N, ), winner of each rollout (the environment value)
+        """
+        boards = np.array(grids)
+        players = np.array(players)
+        rows = np.arange(len(boards))
+        winners = np.zeros(len(boards), dtype=int)
+        while len(rows):
+            probabilities = self.neural_net.get_action_distributions(boards[rows], players[rows])
+            if self.stats:
+                self.stats.rollout_steps += len(rows)
+                self.stats.nn_calls += 1
+            # Sample one action per row from its distribution
+            cumulative = np.cumsum(probabilities, axis=1)
+            thresholds = np.random.random((len(rows), 1))*cumulative[:, -1:]
+            actions = np.argmax(cumulative > thresholds, axis=1)
+            boards[rows, actions] = players[rows]
+            players[rows] = players[rows] ^ (p1 ^ p2)
+            winners[rows] = self.sim_env.check_game_done_batch(boards[rows])
+            rows = rows[winners[rows] == 0]
+        return winners
+
+    def evaluate_pending_leaves(self, pending_leaves, root_player):
+        """
+        Evaluates the collected leaves together, and backpropagates each after removing its virtual loss
+
+        :param pending_leaves: list of (path, grid, player to move)
+        """
+        paths, grids, players = zip(*pending_leaves)
+        if self.leaf_evaluation == 'value':
+            if self.stats:
+                self.stats.nn_calls += 1
+            eval_values = self.neural_net.get_values(np.array(grids), np.array(players))
+        else:
+            eval_values = self.evaluate_leaves(np.array(grids), np.array(players))
+        for path, eval_value in zip(paths, eval_values):
+            self.add_virtual_loss(path, root_player, -1)
+            self.backpropagate(path, eval_value)
+
+    def add_virtual_loss(self, path, root_player, sign):
+        """
+        Counts `virtual_loss` lost visits on the path to a leaf that is waiting for evaluation,
+        so the path looks worse for the players choosing it. sign -1 removes the loss again.
+
+        :param path: list of (node, action slot) from the root
+        :param root_player: int, player to move at the root
+        """
+        loss = sign*self.virtual_loss
+        player = root_player
+        for node, i in path:
+            node.N_s += loss
+            node.N_sa[i] += loss
+            # A loss for the player choosing the action
+            node.E_t[i] -= loss*player
+            node.Q_sa[i] = node.E_t[i]/node.N_sa[i] if node.N_sa[i] else 0
+            player = player ^ (p1 ^ p2)
+
     def get_simulated_action(self, root_node, player_num):
         """
         :param root_node: Node, represents state to find best action from
         :param player_num: tuple(1,0) for P1, (0,1) for P2
 
-        :returns: best action for the player from the current state, given by the highest Q(s,a)-value
-        """
-        best_sim_action = None
-        _, arg_func, best_value = self.get_minimax_functions(player_num)
-        for a in root_node.actions:
-            poss_best_value = root_node.Q_sa[a]
-            best_value = arg_func(best_value, root_node.Q_sa[a])
-            if poss_best_value == best_value:
-                best_value = poss_best_value
-                best_sim_action = a
-        return best_sim_action
-
-    def backpropagate(self, node, eval_value):
-        # BP until node has no parent
-        while not node.is_root:
-            # Skip leaf node, as it has no N(s,a) values
-            node = node.parent
-            node.update(eval_value)
-
-    def get_minimax_functions(self, p_num):
-        if p_num == 1:
-            return lambda x1, x2: x1+x2, lambda x1, x2: np.max((x1, x2)), float("-inf")
-        elif p_num == -1:
-            return lambda x1, x2: x1-x2, lambda x1, x2: np.min((x1, x2)), float("inf")
+        :returns: best action for the player from the current state, given by the highest Q(s,a)-value,
+            or by the most visits with early_stop (the action its rule decides on)
+        """
+        if self.early_stop:
+            values = root_node.N_sa
         else:
-            raise ValueError('Invalid player number: {}'.format(p_num))
+            # Values from the players perspective, so the best action has the highest value
+            values = root_node.Q_sa*player_num
+        # Last of the equally good actions, as when comparing one action at a time
+        best_index = len(values) - 1 - np.argmax(values[::-1])
+        return root_node.actions[best_index]
+
+    def backpropagate(self, path, eval_value):
+        # BP along the path that was walked, a node can have several parents
+        for node, action_index in path:
+            node.update(eval_value, action_index)
@@ -3,86 +3,62 @@ import random
 import tensorflow as tf
 from tensorflow.keras.layers import Input, Dense
 from tensorflow.keras import Model
+from tensorflow.keras.optimizers import Adagrad, Adam, SGD, RMSprop
 from utils import test_time
+from NumpyNet import NumpyNet
 
-from GlobalConstants import hidden_layers, activations, optimizer
+from GlobalConstants import hidden_layers, activations, optimizer, lr, value_head
 
 
-class NeuralNet:
+class NeuralNet(NumpyNet):
     def __init__(self, input_shape):
+        """
+        The ANET, trained with Keras. Moves are predicted by NumpyNet from a copy of the
+        weights, which is updated whenever the weights change.
+        """
         input_layer = Input(shape=input_shape)
         # Define architecture
         x = input_layer
         #assert len(hidden_layers) == len(
         #    activations), 'Different number of hidden layers and activations'
-        for layer, activation in zip(hidden_layers, activations):
+        for layer, activation in zip(hidden_layers[:-1], activations[:-1]):
             x = Dense(layer, activation=activation)(x)
-        self.anet = Model(input_layer, x)
+        policy = Dense(hidden_layers[-1], activation=activations[-1])(x)
+        # Networks sharing the same layers, anet is the one trained and saved
+        self.policy_net = Model(input_layer, policy)
+        self.value_head = value_head
+        if value_head:
+            # Expected result of the game (1 if P1 wins, -1 if P2 wins), from the hidden layers
+            value = Dense(1, activation='tanh')(x)
+            self.value_net = Model(input_layer, value)
+            self.anet = Model(input_layer, [policy, value])
+            loss = ['mean_squared_error', 'mean_squared_error']
+        else:
+            self.value_net = None
+            self.anet = self.policy_net
+            loss = 'mean_squared_error'
         self.anet._name = 'ANET'
         self.history = []
 
         # Compile model
-        self.anet.compile(optimizer=optimizer,
-                          loss='mean_squared_error', metrics=['accuracy'])
-
-    def random_possible_action(self, possible_actions):
-        random_index = np.random.randint(len(possible_actions))
-        return possible_actions[random_index]
-
-    def best_action(self, possible_actions, state, player):
-        """
-        Returns the greedy best action
-        """
-        features = np.append(state, player).reshape((1, len(state)+1))
-        action_probabilities = self.anet(features)
-        # If there are only zeros
-        if not np.any(action_probabilities):
-            print('......only zeros in predictions, returning random action')
-            return self.random_possible_action(possible_actions)
-        action_probabilities = self.scale_actions(state, action_probabilities)
-        return np.argmax(action_probabilities)
-
-    def default_policy(self, possible_actions, state, player):
-        """
-        NOTE: predict takes 0.038 seconds, total runtime without assert is 0.038 (predict uses all)
-        possible_actions: list of tuples
-        state: ndarray
-        player: tuple
-
-        :returns: tuple, action
-        """
-        features = np.append(state, player).reshape((1, len(state)+1))
-        action_probabilities = self.anet(features)
-        # If there are only zeros
-        if not np.any(action_probabilities):
-            print('......only zeros in predictions, returning random action')
-            return self.random_possible_action(possible_actions)
-        action_probabilities = self.scale_actions(state, action_probabilities)
-        return self.get_action(action_probabilities)
-
-    def scale_actions(self, state, action_probabilities):
-        # Make impossible actions have probability 0
-        # If the board is not 0, set action_probabilities to 0
-        # Predict gives (1,len(features)), take first to get (len(features), )
-        action_probabilities = np.where(state, 0, action_probabilities)[0]
-        # Normalize
-        return action_probabilities/np.sum(action_probabilities)
-
-    def get_action(self, scaled_predictions):
-        """
-        Randomly pick action, weighted by scale (illegal actions scaled to 0 by scaled_predictions)
-        """
-        return np.random.choice(len(scaled_predictions), p=scaled_predictions)
+        self.anet.compile(optimizer={'adam': Adam, 'adagrad': Adagrad, 'sgd': SGD,
+                                     'rmsprop': RMSprop}[optimizer](learning_rate=lr),
+                          loss=loss, metrics=['accuracy'])
+        NumpyNet.__init__(self, self.anet.get_weights(), activations, value_head)
 
-    def train_on_rbuf(self, train_X, train_y, batch_size):
+    def train_on_rbuf(self, train_X, train_y, batch_size, train_z=None):
         """
         :param train_X: training features, state+player
         :param train_y: training labels, D (distributions over actions from states)
         :param batch_size: batch size, int
+        :param train_z: value labels, winner of the game each state was in (needed with the value head)
         """
+        if self.value_head:
+            train_y = [train_y, train_z]
         history = self.anet.fit(train_X, train_y, epochs=3,
                       verbose=0, batch_size=batch_size)
         self.history.append(history)
+        self.sync_weights()
 
     def save_params(self, path):
         """
@@ -93,6 +69,8 @@ class NeuralNet:
         https://www.tensorflow.org/tutorials/keras/save_and_load
         """
         self.anet.save_weights(path)
+        # Also for loading without TensorFlow, see NumpyNet.load
+        self.save(path + '.npz')
         print('...parameters have been saved to {}'.format(path))
 
     def load_params(self, path):
@@ -102,3 +80,15 @@ class NeuralNet:
         :param i: str, grid_size and round the params have been saved 
         """
         self.anet.load_weights(path)
+        self.sync_weights()
+
+    def set_weights(self, weights):
+        """
+        :param weights: list of ndarrays, from anet.get_weights() of a net with the same layers
+        """
+        self.anet.set_weights(weights)
+        self.sync_weights()
+
+    def sync_weights(self):
+        # New snapshot for NumpyNet, also clears the policy cache
+        NumpyNet.set_weights(self, self.anet.get_weights())
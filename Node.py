@@ -1,49 +1,71 @@
+import numpy as np
+
+
 class Node:
-    def __init__(self, state: str, parent, is_final, is_root=False):
+    # No per-instance dict, nodes are created in large numbers
+    __slots__ = ('name', 'N_s', 'actions', 'N_sa', 'Q_sa', 'E_t', 'priors', 'children',
+                 'slot', 'is_final_state', 'is_root', 'is_leaf')
+
+    def __init__(self, state, is_final, is_root=False):
         #print('...creating node {}, is final ={}'.format(state, is_final))
+        # Only the root keeps its state, states of other nodes are found by playing the
+        # actions from the root
         self.name = state
-        # Parent is a node
-        self.parent = parent
+        # No parent is kept, a node can be reached from several parents (see TranspositionTable)
         # Generated, but not visited
         self.N_s = 0
-        # Edge-values, to be set when children are generated
-        self.N_sa = {}
-        self.Q_sa = {}
-        self.E_t = {}
+        # Edge-values, arrays indexed by action slot, set when the node is expanded
+        self.actions = None
+        self.N_sa = None
+        self.Q_sa = None
+        self.E_t = None
+        # ANET probabilities of the actions, set on expansion when PUCT is used
+        self.priors = None
+        self.children = None
+        # Row of the edge-values in a NodePool, None if the node has its own arrays
+        self.slot = None
         # Flags to help with traversing methods
         self.is_final_state = is_final
         self.is_root = is_root
         # Newly generated nodes are leaf-nodes
         self.is_leaf = True
 
-    def set_children(self, actions, children):
+    def set_actions(self, actions, arrays=None):
         """
-        :param children: list of actions
-        :param actions: list of nodes, children of corresponding actions
+        Makes the node an inner node. Children are created when their action is first chosen.
+
+        :param actions: list of actions
+        :param arrays: tuple of arrays (actions, N_sa, Q_sa, E_t) to use for the edge-values
+            (views from a NodePool), new arrays are made if None
         """
-        # Set actions and corresponding children of self
-        self.actions = tuple(actions)
-        self.children = tuple(children)
+        # None for untried actions
+        self.children = [None]*len(actions)
         self.is_leaf = False
-        for a in self.actions:
-            self.N_sa[a] = 0
-            self.Q_sa[a] = 0
-            self.E_t[a] = 0
+        if arrays is None:
+            self.actions = np.array(actions)
+            self.N_sa = np.zeros(len(actions), dtype=int)
+            self.Q_sa = np.zeros(len(actions))
+            self.E_t = np.zeros(len(actions))
+            return
+        self.actions, self.N_sa, self.Q_sa, self.E_t = arrays
+        self.actions[:] = actions
+        # Rows are reused, so clear them
+        self.N_sa[:] = 0
+        self.Q_sa[:] = 0
+        self.E_t[:] = 0
+
+    def add_child(self, action_index, child):
+        self.children[action_index] = child
 
-    def update(self, eval_value):
+    def update(self, eval_value, i):
         #print('...updating values for {}'.format(self.name))
-        # Update values for a node
+        # Update values for a node, where action slot `i` was taken
         self.N_s += 1
-        self.E_t[self.action_done] += eval_value
-        self.N_sa[self.action_done] += 1
-        self.Q_sa[self.action_done] = self.E_t[self.action_done] / \
-            self.N_sa[self.action_done]
+        self.E_t[i] += eval_value
+        self.N_sa[i] += 1
+        self.Q_sa[i] = self.E_t[i] / self.N_sa[i]
         #self.print_node_values()
 
     def print_node_values(self):
         print('-N_s: {}\n-E_t: {}\n-N_sa: {}\n-Q_sa: {}'.format(self.N_s,
                                                                 self.E_t, self.N_sa, self.Q_sa))
-
-    def set_action_done(self, action):
-        self.action_done = action
-        #print('...doing {} from:\n{}'.format(action,self.name))
\ No newline at end of file
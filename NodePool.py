@@ -0,0 +1,97 @@
+import sys
+import numpy as np
+
+from Node import Node
+
+# Edge statistics of a node, one slab per field, each node has one row in every slab
+FIELDS = (('actions', int), ('N_sa', int), ('Q_sa', float), ('E_t', float), ('priors', float))
+
+
+class NodePool:
+    def __init__(self, width, max_bytes=None, chunk_size=1024):
+        """
+        Storage for the edge statistics of expanded nodes. The rows are allocated in chunks of
+        `chunk_size` nodes, the arrays of a node are views of its row, and rows of released
+        nodes are reused. Chunks are zero-filled lazily by the OS, so untouched rows cost nothing.
+
+        :param width: int, most actions of a node (cells of the board)
+        :param max_bytes: int, memory the expanded nodes may use, None for no limit
+        :param chunk_size: int, nodes per allocation
+        """
+        self.width = width
+        self.chunk_size = chunk_size
+        self.slabs = {name: [] for name, _ in FIELDS}
+        self.free_slots = []
+        self.num_slots = 0
+        # Node using each slot, None for free slots
+        self.owners = []
+        # A node uses its rows, and the node object, its children list and the views of its rows
+        sample = np.zeros(1)[:0]
+        object_bytes = (sys.getsizeof(Node(None, is_final=False)) + sys.getsizeof([None]*width) +
+                        len(FIELDS)*sys.getsizeof(sample))
+        self.bytes_per_node = width*sum(np.dtype(dtype).itemsize for _, dtype in FIELDS) + object_bytes
+        self.max_nodes = None if max_bytes is None else max(max_bytes//self.bytes_per_node, 1)
+        self.nodes_in_use = 0
+        self.peak_nodes = 0
+
+    def allocate(self, node=None):
+        """
+        :param node: Node that will use the row
+
+        :returns: int, slot of a free row, or None if the memory limit is reached
+        """
+        if not self.free_slots:
+            size = self.chunk_size
+            if self.max_nodes is not None:
+                size = min(size, self.max_nodes - self.num_slots)
+                if size <= 0:
+                    return None
+            for name, dtype in FIELDS:
+                self.slabs[name].append(np.zeros((size, self.width), dtype=dtype))
+            # Lowest slots first
+            self.free_slots.extend(range(self.num_slots + size - 1, self.num_slots - 1, -1))
+            self.owners.extend([None]*size)
+            self.num_slots += size
+        self.nodes_in_use += 1
+        self.peak_nodes = max(self.peak_nodes, self.nodes_in_use)
+        slot = self.free_slots.pop()
+        self.owners[slot] = node
+        return slot
+
+    def get_arrays(self, slot, num_actions):
+        """
+        :returns: tuple of views (actions, N_sa, Q_sa, E_t, priors) of the row, `num_actions` long
+        """
+        chunk, row = divmod(slot, self.chunk_size)
+        return tuple(self.slabs[name][chunk][row, :num_actions] for name, _ in FIELDS)
+
+    def release(self, slot):
+        self.free_slots.append(slot)
+        self.owners[slot] = None
+        self.nodes_in_use -= 1
+
+    def get_owners(self):
+        """
+        :returns: list of (slot, node) of the rows in use
+        """
+        return [(slot, node) for slot, node in enumerate(self.owners) if node is not None]
+
+    def reset(self):
+        # Every row is free, the nodes using them must not be used any more
+        self.free_slots = list(range(self.num_slots - 1, -1, -1))
+        self.owners = [None]*self.num_slots
+        self.nodes_in_use = 0
+
+    def get_stats(self):
+        """
+        :returns: dict, expanded nodes in use and their bytes, the peak of both (since the last
+            reset_peak), and the bytes allocated for rows
+        """
+        return {'nodes': self.nodes_in_use,
+                'bytes': self.nodes_in_use*self.bytes_per_node,
+                'peak_nodes': self.peak_nodes,
+                'peak_bytes': self.peak_nodes*self.bytes_per_node,
+                'allocated_bytes': sum(slab.nbytes for slabs in self.slabs.values() for slab in slabs)}
+
+    def reset_peak(self):
+        self.peak_nodes = self.nodes_in_use
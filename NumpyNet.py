@@ -0,0 +1,192 @@
+import os
+import numpy as np
+
+from PolicyCache import PolicyCache
+from GlobalConstants import activations as default_activations, policy_cache_size
+
+
+def softmax(x):
+    # Shifted by the row maximum, so large inputs do not overflow
+    e = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return e/np.sum(e, axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {'linear': lambda x: x,
+               'sigmoid': lambda x: 1/(1 + np.exp(-x)),
+               'tanh': np.tanh,
+               'relu': lambda x: np.maximum(x, 0),
+               'softmax': softmax}
+
+
+class NumpyNet:
+    def __init__(self, weights, activations=default_activations, value_head=False, name='ANET'):
+        """
+        Forward pass of the ANET with NumPy only, from a snapshot of its weights. Has the policy
+        methods of NeuralNet (default_policy, best_action, get_action_distributions, get_values),
+        so it can be used as an agent or in MCTS without TensorFlow.
+
+        :param weights: list of ndarrays, anet.get_weights() (kernel and bias of every Dense layer,
+            in order, the value layer last)
+        :param activations: list of str, activation of each layer of the policy
+        :param value_head: bool, the last kernel and bias are a tanh value output on the hidden layers
+        :param name: str, name of the agent (in TOPP)
+        """
+        self.activations = list(activations)
+        self.value_head = value_head
+        self.name = name
+        # Distributions of positions seen before, None for no cache
+        self.policy_cache = PolicyCache(policy_cache_size) if policy_cache_size else None
+        NumpyNet.set_weights(self, weights)
+
+    def set_weights(self, weights):
+        """
+        :param weights: list of ndarrays, as in the constructor
+        """
+        weights = [np.array(w) for w in weights]
+        # (kernel, bias, activation) of each layer of the policy
+        self.layers = [(weights[2*i], weights[2*i+1], ACTIVATIONS[activation])
+                       for i, activation in enumerate(self.activations)]
+        self.value_layer = (weights[-2], weights[-1]) if self.value_head else None
+        # Cached distributions are from the old weights
+        if self.policy_cache is not None:
+            self.policy_cache.clear()
+
+    def get_weights(self):
+        weights = [w for kernel, bias, _ in self.layers for w in (kernel, bias)]
+        if self.value_head:
+            weights.extend(self.value_layer)
+        return weights
+
+    def save(self, path):
+        """
+        :param path: str, .npz file with the weights and the layout of the net
+        """
+        np.savez(path, *self.get_weights(), activations=np.array(self.activations),
+                 value_head=self.value_head, name=self.name)
+
+    @classmethod
+    def load(cls, path):
+        """
+        :param path: str, .npz file written by save
+
+        :returns: NumpyNet
+        """
+        with np.load(path) as data:
+            weights = [data['arr_{}'.format(i)] for i in range(len(data.files) - 3)]
+            return cls(weights, [str(a) for a in data['activations']], bool(data['value_head']),
+                       str(data['name']))
+
+    def hidden(self, features):
+        x = features
+        for kernel, bias, activation in self.layers[:-1]:
+            x = activation(x @ kernel + bias)
+        return x
+
+    def best_action(self, possible_actions, state, player):
+        """
+        Returns the greedy best action
+        """
+        action_probabilities = self.get_action_distribution(state, player)
+        return np.argmax(action_probabilities)
+
+    def default_policy(self, possible_actions, state, player):
+        """
+        :returns: int, action drawn from the action distribution of `state`
+        """
+        action_probabilities = self.get_action_distribution(state, player)
+        return self.get_action(action_probabilities)
+
+    def get_action_distribution(self, state, player):
+        """
+        :returns: ndarray, (cells, ) probabilities, 0 for illegal actions (from the cache if possible)
+        """
+        if self.policy_cache is None:
+            return self.predict_action_distributions(np.asarray(state)[None], np.array([player]))[0]
+        key = self.policy_cache.get_key(state, player)
+        action_probabilities = self.policy_cache.get(key)
+        if action_probabilities is None:
+            action_probabilities = self.predict_action_distributions(
+                np.asarray(state)[None], np.array([player]))[0]
+            self.policy_cache.put(key, action_probabilities)
+        return action_probabilities
+
+    def get_action_distributions(self, states, players):
+        """
+        Action distributions for many states, the ones not in the cache in one forward pass
+
+        :param states: ndarray, (N, cells) boards
+        :param players: ndarray, (N, ) player to move in each board
+
+        :returns: ndarray, (N, cells) probabilities, 0 for illegal actions, rows sum to 1
+        """
+        if self.policy_cache is None:
+            return self.predict_action_distributions(states, players)
+        states = np.asarray(states)
+        players = np.asarray(players)
+        keys = [self.policy_cache.get_key(state, player) for state, player in zip(states, players)]
+        action_probabilities = np.empty(states.shape)
+        missing = []
+        for row, key in enumerate(keys):
+            cached = self.policy_cache.get(key)
+            if cached is None:
+                missing.append(row)
+            else:
+                action_probabilities[row] = cached
+        if missing:
+            predictions = self.predict_action_distributions(states[missing], players[missing])
+            action_probabilities[missing] = predictions
+            for row, prediction in zip(missing, predictions):
+                self.policy_cache.put(keys[row], prediction)
+        return action_probabilities
+
+    def predict_action_distributions(self, states, players):
+        """
+        Action distributions for many states in one forward pass, without the cache
+
+        :returns: ndarray, (N, cells) probabilities, 0 for illegal actions, rows sum to 1
+        """
+        features = np.column_stack((states, players)).astype(float)
+        kernel, bias, activation = self.layers[-1]
+        action_probabilities = activation(self.hidden(features) @ kernel + bias)
+        action_probabilities = np.where(states, 0, action_probabilities)
+        # Rows with only zeros for the legal actions get a uniform distribution
+        totals = np.sum(action_probabilities, axis=1, keepdims=True)
+        action_probabilities = np.where(totals > 0, action_probabilities, states == 0)
+        return action_probabilities/np.sum(action_probabilities, axis=1, keepdims=True)
+
+    def get_values(self, states, players):
+        """
+        Values of many states in one forward pass, needs the value head
+
+        :param states: ndarray, (N, cells) boards
+        :param players: ndarray, (N, ) player to move in each board
+
+        :returns: ndarray, (N, ) expected result of each game, between -1 (P2 wins) and 1 (P1 wins)
+        """
+        features = np.column_stack((states, players)).astype(float)
+        kernel, bias = self.value_layer
+        return np.tanh(self.hidden(features) @ kernel + bias)[:, 0]
+
+    def get_action(self, scaled_predictions):
+        """
+        Randomly pick action, weighted by scale (illegal actions scaled to 0 by scaled_predictions)
+        """
+        return np.random.choice(len(scaled_predictions), p=scaled_predictions)
+
+
+def load_agent(path, input_shape):
+    """
+    Loads saved parameters for playing. Without TensorFlow if they were saved with an .npz copy
+    (NeuralNet.save_params), otherwise the TensorFlow checkpoint is loaded into a NeuralNet.
+
+    :param path: str, path the parameters were saved to
+    :param input_shape: int, inputs of the net (for a NeuralNet)
+
+    :returns: NumpyNet or NeuralNet
+    """
+    if os.path.exists(path + '.npz'):
+        return NumpyNet.load(path + '.npz')
+    from NeuralNet import NeuralNet
+    neural_net = NeuralNet(input_shape)
+    neural_net.load_params(path)
+    return neural_net
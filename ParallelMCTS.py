@@ -0,0 +1,130 @@
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import numpy as np
+
+from Environment import Environment
+from MCTS import MCTS
+from Node import Node
+from NumpyNet import NumpyNet
+from SearchStats import SearchStats
+
+# Search of the worker process, set up by init_worker
+worker = {}
+
+
+def init_worker(grid_size, backend, mcts_kwargs):
+    worker['mcts'] = MCTS(Environment(grid_size, backend), None, 1, **mcts_kwargs)
+    worker['weights_version'] = None
+
+
+def worker_simulate(task):
+    """
+    One independent search in a worker process
+
+    :returns: (actions, N_sa, E_t) of the root, and the memory statistics and SearchStats (or None) of the search
+    """
+    (player_number, M, init_state, time_budget, seed, random_leaf_eval_fraction,
+     weights_version, weights_path) = task
+    mcts = worker['mcts']
+    if weights_path is not None and weights_version != worker['weights_version']:
+        # Only workers that get weights (ANET rollouts are used) have a network, for inference
+        # only, so without TensorFlow. The file has the layout of the net as well
+        mcts.neural_net = NumpyNet.load(weights_path)
+        worker['weights_version'] = weights_version
+    random.seed(seed)
+    np.random.seed(seed)
+    mcts.random_leaf_eval_fraction = random_leaf_eval_fraction
+    # Searches are independent, nothing is kept from the last one (the transposition
+    # table would otherwise give back the old root)
+    mcts.reset()
+    mcts.simulate(player_number, M, init_state, time_budget)
+    return mcts.root.actions, mcts.root.N_sa, mcts.root.E_t, mcts.memory_stats, mcts.stats
+
+
+class ParallelMCTS(MCTS):
+    def __init__(self, env, neural_net, random_leaf_eval_fraction, num_workers, **mcts_kwargs):
+        """
+        Root-parallel MCTS: each worker process searches the same root with its own random
+        seed, and the visit counts and values of the root actions are summed.
+        The worker pool is created once, call close when done with it.
+
+        :param num_workers: int, number of worker processes
+        :param mcts_kwargs: other arguments for the MCTS of each worker
+        """
+        MCTS.__init__(self, env, neural_net, random_leaf_eval_fraction, **mcts_kwargs)
+        self.num_workers = num_workers
+        self.workers = multiprocessing.get_context('spawn').Pool(
+            num_workers, initializer=init_worker, initargs=(env.grid_size, env.backend, mcts_kwargs))
+        # Workers load new weights when the version changes, from a file written once per version
+        # (tasks are small, and the weights are not pickled for every move)
+        self.weights_version = 0
+        self.weights_dir = tempfile.mkdtemp(prefix='anet_weights_')
+        self.weights_path = None
+        self.seeds = np.random.SeedSequence()
+
+    def sync_weights(self):
+        """
+        Must be called when the weights of the neural net have changed (after training)
+        """
+        self.weights_version += 1
+
+    def get_weights_path(self):
+        """
+        :returns: str, .npz file with the net of the current version (see NumpyNet.save), written if it is new
+        """
+        path = os.path.join(self.weights_dir, 'weights_{}.npz'.format(self.weights_version))
+        if path != self.weights_path:
+            self.neural_net.save(path)
+            # Workers are done with the old version, map waits for all of them
+            if self.weights_path is not None:
+                os.remove(self.weights_path)
+            self.weights_path = path
+        return path
+
+    def simulate(self, player_number: tuple, M: int, init_state, time_budget=None):
+        # Split the simulations between the workers, with a time budget they all search until it is used
+        if M is None:
+            simulations = [None]*self.num_workers
+        else:
+            simulations = [M//self.num_workers + (w < M % self.num_workers) for w in range(self.num_workers)]
+        seeds = [int(seed.generate_state(1)[0]) for seed in self.seeds.spawn(self.num_workers)]
+        weights_path = None
+        if self.neural_net is not None and (self.random_leaf_eval_fraction < 1 or self.selection == 'puct'):
+            weights_path = self.get_weights_path()
+        tasks = [(player_number, m, init_state, time_budget, seed, self.random_leaf_eval_fraction,
+                  self.weights_version, weights_path)
+                 for m, seed in zip(simulations, seeds) if m is None or m > 0]
+        results = self.workers.map(worker_simulate, tasks)
+        # Every worker has the same root actions (all legal actions, in increasing order)
+        node = Node(init_state, is_final=False, is_root=True)
+        node.set_actions(results[0][0])
+        node.N_sa = np.sum([N_sa for _, N_sa, _, _, _ in results], axis=0)
+        node.E_t = np.sum([E_t for _, _, E_t, _, _ in results], axis=0)
+        node.Q_sa = np.where(node.N_sa > 0, node.E_t/np.maximum(node.N_sa, 1), 0)
+        node.N_s = int(np.sum(node.N_sa))
+        self.root = node
+        self.simulations_done = node.N_s
+        self.simulations_saved = M - node.N_s if M is not None else 0
+        # Totals over the workers
+        self.memory_stats = {name: sum(stats[name] for _, _, _, stats, _ in results)
+                             for name in results[0][3]}
+        self.stats = None
+        if self.profile:
+            # Times are summed over the workers (CPU time, not wall-clock time)
+            self.stats = SearchStats()
+            for result in results:
+                self.stats.add(result[4])
+        action_distributions = self.get_action_distribution(node)
+        return self.get_simulated_action(node, player_number), action_distributions
+
+    def advance(self, action):
+        # Every search starts from scratch in the workers
+        self.root = None
+
+    def close(self):
+        self.workers.close()
+        self.workers.join()
+        shutil.rmtree(self.weights_dir, ignore_errors=True)
@@ -0,0 +1,52 @@
+from collections import OrderedDict
+import numpy as np
+
+
+class PolicyCache:
+    def __init__(self, max_size):
+        """
+        Action distributions of the neural net by (board, player), for positions that are
+        evaluated again and again (openings, rollout prefixes, TOPP games). Holds at most
+        `max_size` distributions, and evicts the least recently used.
+        Must be cleared when the weights of the net change.
+
+        :param max_size: int, maximum number of distributions in the cache
+        """
+        self.max_size = max_size
+        self.distributions = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.distributions)
+
+    @staticmethod
+    def get_key(state, player):
+        # Boards are stored as different integer and float types, the key is the same for all
+        return np.asarray(state, dtype=np.int8).tobytes(), int(player)
+
+    def get(self, key):
+        """
+        :returns: ndarray, the cached distribution for `key`, None if it is not in the cache
+        """
+        distribution = self.distributions.get(key)
+        if distribution is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Most recently used last
+        self.distributions.move_to_end(key)
+        return distribution
+
+    def put(self, key, distribution):
+        # A copy, as a row of a batch would keep the whole batch in memory. Shared by every
+        # caller, so it must not be changed
+        distribution = np.array(distribution)
+        distribution.flags.writeable = False
+        self.distributions[key] = distribution
+        self.distributions.move_to_end(key)
+        if len(self.distributions) > self.max_size:
+            self.distributions.popitem(last=False)
+
+    def clear(self):
+        self.distributions.clear()
@@ -0,0 +1,133 @@
+from functools import lru_cache
+import multiprocessing
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+import matplotlib.animation
+
+from Geometry import get_geometry
+
+# Colour of empty cells, P1 (1) and P2 (-1), indexed by boardcell value + 1
+CELL_COLORS = np.array([[1.0, 0.0, 1.0, 1.0],            # magenta
+                        [0.827, 0.827, 0.827, 1.0],      # lightgrey
+                        [0.529, 0.808, 0.980, 1.0]])     # lightskyblue
+
+
+@lru_cache(maxsize=None)
+def get_layout(grid_size):
+    """
+    Node positions and edge segments of the hex grid, the same layout as Board.display_board_graph
+
+    :returns: (ndarray (cells, 2) of positions, ndarray (edges, 2, 2) of line segments, labels)
+    """
+    geometry = get_geometry(grid_size)
+    positions = np.stack((geometry.columns - geometry.rows,
+                          -geometry.rows - geometry.columns), axis=1).astype(float)
+    segments = np.array([(positions[i], positions[n])
+                         for i in range(geometry.cells) for n in geometry.cell_neighbours[i] if n > i])
+    # Cell numbers only fit in the nodes of small boards
+    labels = grid_size < 5
+    return positions, segments, labels
+
+
+def get_node_spacing(ax, positions, margin):
+    """
+    Distance between neighbouring nodes in points, when the board fills `ax` with equal aspect
+
+    :param positions: ndarray, (cells, 2) node positions
+    :param margin: float, margin of the axes on each side, relative to the board extent
+
+    :returns: float
+    """
+    width, height = ax.get_position().size*ax.figure.get_size_inches()*72
+    extent = np.maximum(np.ptp(positions, axis=0), 1)*(1 + 2*margin)
+    # Neighbours are sqrt(2) apart in the layout
+    return np.sqrt(2)*min(width/extent[0], height/extent[1])
+
+
+class BoardRenderer:
+    def __init__(self, grid_size, ax):
+        """
+        Draws boards on `ax`. The nodes, edges and labels are added once,
+        each call to draw only changes the node colours. Node and line sizes
+        follow the size of `ax`, so boards in small subplots are drawn to scale.
+
+        :param grid_size: int, size of the board
+        :param ax: matplotlib Axes to draw on
+        """
+        positions, segments, labels = get_layout(grid_size)
+        self.ax = ax
+        # Room for the node markers around the outer cells
+        margin = 0.15
+        spacing = get_node_spacing(ax, positions, margin)
+        node_diameter = 0.7*spacing
+        ax.set_axis_off()
+        ax.add_collection(LineCollection(segments, colors='black', linewidths=max(0.04*spacing, 0.3),
+                                         zorder=1))
+        self.nodes = ax.scatter(positions[:, 0], positions[:, 1], s=node_diameter**2,
+                                linewidths=max(0.02*spacing, 0.2),
+                                c=np.tile(CELL_COLORS[1], (len(positions), 1)), zorder=2)
+        if labels:
+            for ind, (x, y) in enumerate(positions):
+                ax.text(x, y, str(ind), ha='center', va='center', fontsize=0.35*node_diameter, zorder=3)
+        ax.margins(margin)
+        ax.set_aspect('equal')
+
+    def draw(self, grid):
+        """
+        :param grid: ndarray, board to show
+
+        :returns: list of the changed artists (for blitting)
+        """
+        self.nodes.set_facecolor(CELL_COLORS[np.asarray(grid, dtype=int) + 1])
+        return [self.nodes]
+
+
+def export_game(states, path, grid_size, frame_delay=500):
+    """
+    Saves a game without opening a window. The format is given by the file extension:
+    .gif and .mp4 give an animation (.mp4 needs ffmpeg), .png a strip of all states.
+
+    :param states: list of ndarrays, the states of the game
+    :param path: str, file to save to
+    :param frame_delay: int, milliseconds per frame in animations
+    """
+    if path.endswith('.png'):
+        columns = min(len(states), 8)
+        rows = int(np.ceil(len(states)/columns))
+        fig = Figure(figsize=(2.5*columns, 2.5*rows))
+        FigureCanvasAgg(fig)
+        # Boards fill their cells of the strip, the markers are sized to fit
+        fig.subplots_adjust(left=0, right=1, bottom=0, top=1, wspace=0, hspace=0)
+        for i, state in enumerate(states):
+            BoardRenderer(grid_size, fig.add_subplot(rows, columns, i+1)).draw(state)
+        fig.savefig(path)
+        return
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    renderer = BoardRenderer(grid_size, fig.add_subplot())
+    ani = matplotlib.animation.FuncAnimation(
+        fig, lambda i: renderer.draw(states[i]), frames=len(states), interval=frame_delay,
+        repeat=False, blit=True)
+    if path.endswith('.gif'):
+        writer = matplotlib.animation.PillowWriter(fps=1000/frame_delay)
+    elif path.endswith('.mp4'):
+        writer = matplotlib.animation.FFMpegWriter(fps=1000/frame_delay)
+    else:
+        raise ValueError('Unknown file type for game export: {}'.format(path))
+    ani.save(path, writer=writer)
+
+
+def export_game_in_background(states, path, grid_size, frame_delay=500):
+    """
+    Runs export_game in a separate process, so the caller does not wait for the rendering
+
+    :returns: multiprocessing.Process, can be joined to wait for the file
+    """
+    # Plain ndarrays, so the states are cheap to send to the process
+    states = [np.array(state) for state in states]
+    process = multiprocessing.get_context('spawn').Process(
+        target=export_game, args=(states, path, grid_size, frame_delay))
+    process.start()
+    return process
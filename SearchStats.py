@@ -0,0 +1,45 @@
+PHASES = ('traverse', 'expand', 'random_eval', 'anet_eval', 'backprop')
+
+
+class SearchStats:
+    def __init__(self):
+        """
+        Where the time of MCTS searches goes, filled in by MCTS.simulate when profiling is on.
+        Times are nanoseconds from time.perf_counter_ns, summed over simulations.
+        Batched ANET evaluations (with their backpropagation) are counted in anet_eval.
+        """
+        self.traverse_ns = 0
+        self.expand_ns = 0
+        self.random_eval_ns = 0
+        self.anet_eval_ns = 0
+        self.backprop_ns = 0
+        self.simulations = 0
+        # Moves played in rollouts (cells filled by fill_rollout)
+        self.rollout_steps = 0
+        # Forward passes of the neural net, a batch counts once
+        self.nn_calls = 0
+        # Sum of the path lengths from the root to the evaluated leaves
+        self.total_depth = 0
+
+    @property
+    def mean_depth(self):
+        return self.total_depth/max(self.simulations, 1)
+
+    def add(self, other):
+        """
+        Adds the counts of `other`, e.g. to sum the searches of a game
+
+        :param other: SearchStats
+        """
+        for name in vars(self):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def __str__(self):
+        total_ns = max(sum(getattr(self, phase + '_ns') for phase in PHASES), 1)
+        lines = ['{} simulations, {} rollout steps, {} NN calls, mean depth {}'.format(
+            self.simulations, self.rollout_steps, self.nn_calls, round(self.mean_depth, 2))]
+        for phase in PHASES:
+            phase_ns = getattr(self, phase + '_ns')
+            lines.append('-{}: {} ms ({}%)'.format(phase, round(phase_ns/1e6, 1),
+                                                  round(phase_ns/total_ns*100, 1)))
+        return '\n'.join(lines)
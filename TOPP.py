@@ -28,9 +28,11 @@ class TOPP:
         self.players = players
         self.scores = {}
         self.policy = policy
+        # Board tables are shared, so one environment serves every game
+        self.env = Environment(grid_size)
         # Initiate dictionary, no one has won anything yet
         for nn in players:
-            self.scores[nn.anet._name] = 0
+            self.scores[nn.name] = 0
 
     def play_one_game(self, starting_player: int, player_one, player_two):
         """
@@ -40,7 +42,7 @@ class TOPP:
 
         :returns: int, 1 or -1: winner of the game
         """
-        env = Environment(grid_size)
+        env = self.env
         state = env.generate_initial_state()
         states_in_game = []
         current_player = starting_player
@@ -90,7 +92,7 @@ class TOPP:
         """
         # Player that has been trained to start always starts the series
         starting_player = P
-        player_names = {1: player_one.anet._name, -1: player_two.anet._name}
+        player_names = {1: player_one.name, -1: player_two.name}
         for i in range(num_games):
             if verbose:
                 print('*** PLAYOFF BETWEEN {} AS Player 1 AND {} AS Player -1'.format(player_names[1], player_names[-1]))
@@ -140,4 +142,4 @@ class TOPP:
         self.scores = {}
         # Initiate dictionary, no one has won anything yet
         for nn in self.players:
-            self.scores[nn.anet._name] = 0
\ No newline at end of file
+            self.scores[nn.name] = 0
\ No newline at end of file
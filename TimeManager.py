@@ -0,0 +1,45 @@
+import math
+import time
+
+
+class TimeManager:
+    def __init__(self, game_time, increment=0, min_moves_left=3, safety_margin=0.1):
+        """
+        Splits one player's clock over the moves of a game. Each move gets an even share of
+        the time left, over the moves the player is expected to still make.
+
+        :param game_time: float, seconds for all the player's moves in a game
+        :param increment: float, seconds added to the clock after each move
+        :param min_moves_left: int, moves the time left is always shared over, so late moves
+            (when the game may go on longer than expected) still get time
+        :param safety_margin: float, seconds never used, for the time spent outside the search
+        """
+        self.game_time = game_time
+        self.increment = increment
+        self.min_moves_left = min_moves_left
+        self.safety_margin = safety_margin
+        self.time_left = game_time
+        self.move_start = None
+
+    def new_game(self):
+        self.time_left = self.game_time
+
+    def start_move(self, num_empty):
+        """
+        :param num_empty: int, empty cells on the board, the player makes at most half of them (rounded up)
+
+        :returns: float, seconds to search this move
+        """
+        self.move_start = time.perf_counter()
+        moves_left = max(math.ceil(num_empty/2), self.min_moves_left)
+        return max(self.time_left - self.safety_margin, 0)/moves_left + self.increment
+
+    def end_move(self):
+        """
+        Subtracts the time since start_move from the clock
+
+        :returns: float, seconds used by the move
+        """
+        elapsed = time.perf_counter() - self.move_start
+        self.time_left += self.increment - elapsed
+        return elapsed
@@ -0,0 +1,52 @@
+from collections import OrderedDict
+
+
+class TranspositionTable:
+    def __init__(self, max_size):
+        """
+        Nodes of the search by state key, so a state reached through different move orders
+        is one node. Holds at most `max_size` nodes, and evicts the least recently used.
+        Evicted nodes stay in the tree, they are only no longer shared with new paths.
+
+        :param max_size: int, maximum number of nodes in the table
+        """
+        self.max_size = max_size
+        self.nodes = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def get(self, key):
+        """
+        :returns: Node with state `key`, None if it is not in the table
+        """
+        node = self.nodes.get(key)
+        if node is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Most recently used last
+        self.nodes.move_to_end(key)
+        return node
+
+    def put(self, key, node):
+        self.nodes[key] = node
+        self.nodes.move_to_end(key)
+        if len(self.nodes) > self.max_size:
+            self.nodes.popitem(last=False)
+            self.evictions += 1
+
+    def retain(self, node_ids):
+        """
+        Drops the nodes that are not in `node_ids`, keeping the order of the others
+
+        :param node_ids: set of ints, id() of the nodes to keep
+        """
+        for key in [key for key, node in self.nodes.items() if id(node) not in node_ids]:
+            del self.nodes[key]
+
+    def clear(self):
+        self.nodes.clear()
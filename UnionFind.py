@@ -0,0 +1,149 @@
+class UnionFind:
+    def __init__(self, geometry):
+        """
+        Incremental connectivity tracker for a hex board.
+
+        Every boardcell is a node, and there are four virtual edge nodes: top and bottom
+        (P1 connects rows), left and right (P2 connects columns). Placing a stone joins it
+        with its neighbours of the same player and with the edges it touches, so the winner
+        is known right after every move.
+
+        :param geometry: Geometry, tables of the board size
+        """
+        cells = geometry.cells
+        self.grid_size = geometry.grid_size
+        self.cell_neighbours = geometry.cell_neighbours
+        # Virtual edge nodes are placed after the boardcells
+        self.top = cells
+        self.bottom = cells + 1
+        self.left = cells + 2
+        self.right = cells + 3
+        self.parent = list(range(cells + 4))
+        self.size = [1]*(cells + 4)
+        # 1 if P1 has won, -1 if P2 has won, 0 if the game is not done
+        self.winner = 0
+
+    @classmethod
+    def from_grid(cls, geometry, grid):
+        """
+        Builds a tracker for a board that already has pieces on it
+
+        :param grid: ndarray, grid in some state
+        """
+        tracker = cls(geometry)
+        for ind in range(geometry.cells):
+            if grid[ind] != 0:
+                tracker.add_stone(grid, ind, grid[ind])
+        return tracker
+
+    def copy(self):
+        tracker = self.__class__.__new__(self.__class__)
+        tracker.grid_size = self.grid_size
+        tracker.cell_neighbours = self.cell_neighbours
+        tracker.top = self.top
+        tracker.bottom = self.bottom
+        tracker.left = self.left
+        tracker.right = self.right
+        tracker.parent = self.parent[:]
+        tracker.size = self.size[:]
+        tracker.winner = self.winner
+        return tracker
+
+    def find(self, ind):
+        parent = self.parent
+        while parent[ind] != ind:
+            # Path halving, point every other node on the path to its grandparent
+            parent[ind] = parent[parent[ind]]
+            ind = parent[ind]
+        return ind
+
+    def union(self, a, b):
+        root_a = self.find(a)
+        root_b = self.find(b)
+        if root_a == root_b:
+            return
+        # Attach the smaller tree below the larger one
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+
+    def add_stone(self, grid, ind, player):
+        """
+        Registers a piece that has been placed on the grid
+
+        :param grid: ndarray, grid where `player` has been placed on `ind`
+        :param ind: int, index of the boardcell
+        :param player: int, 1 for P1, -1 for P2
+        """
+        for n in self.cell_neighbours[ind]:
+            if grid[n] == player:
+                self.union(ind, n)
+        row = ind // self.grid_size
+        column = ind % self.grid_size
+        if player == 1:
+            if row == 0:
+                self.union(ind, self.top)
+            if row == self.grid_size - 1:
+                self.union(ind, self.bottom)
+            # Only the player making the move can complete a path
+            if self.find(self.top) == self.find(self.bottom):
+                self.winner = 1
+        else:
+            if column == 0:
+                self.union(ind, self.left)
+            if column == self.grid_size - 1:
+                self.union(ind, self.right)
+            if self.find(self.left) == self.find(self.right):
+                self.winner = -1
+
+
+class UndoableUnionFind(UnionFind):
+    def __init__(self, geometry):
+        """
+        UnionFind where the last added stones can be taken back with undo_stone.
+        Finds do not compress paths, so every union can be reverted by resetting one parent.
+        """
+        UnionFind.__init__(self, geometry)
+        # (attached root, root it was attached to) for every union done
+        self.unions = []
+        # (number of unions, winner) before each added stone
+        self.history = []
+
+    def copy(self):
+        # The copy can undo the same stones, independently of this one
+        tracker = UnionFind.copy(self)
+        tracker.unions = self.unions[:]
+        tracker.history = self.history[:]
+        return tracker
+
+    def find(self, ind):
+        parent = self.parent
+        while parent[ind] != ind:
+            ind = parent[ind]
+        return ind
+
+    def union(self, a, b):
+        root_a = self.find(a)
+        root_b = self.find(b)
+        if root_a == root_b:
+            return
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        self.unions.append((root_b, root_a))
+
+    def add_stone(self, grid, ind, player):
+        self.history.append((len(self.unions), self.winner))
+        UnionFind.add_stone(self, grid, ind, player)
+
+    def undo_stone(self):
+        """
+        Reverts the last call to add_stone
+        """
+        num_unions, self.winner = self.history.pop()
+        while len(self.unions) > num_unions:
+            root_b, root_a = self.unions.pop()
+            self.parent[root_b] = root_b
+            self.size[root_a] -= self.size[root_b]
@@ -0,0 +1,110 @@
+import sys
+import time
+import multiprocessing
+import numpy as np
+
+from Environment import Environment
+from MCTS import MCTS
+from ParallelMCTS import ParallelMCTS
+from Node import Node
+from utils import test_time
+
+
+def loop_tree_policy(c, node, p_num):
+    # UCT one action at a time, as MCTS.tree_policy did before it was vectorized
+    if p_num == 1:
+        combine_function, arg_function, best_value = lambda x1, x2: x1+x2, lambda x1, x2: np.max((x1, x2)), float("-inf")
+    else:
+        combine_function, arg_function, best_value = lambda x1, x2: x1-x2, lambda x1, x2: np.min((x1, x2)), float("inf")
+    best_action_index = None
+    for i in range(len(node.actions)):
+        u = c*np.sqrt(np.log(node.N_s)/(1+node.N_sa[i]))
+        possible_best = combine_function(node.Q_sa[i], u)
+        best_value = arg_function(possible_best, best_value)
+        if best_value == possible_best:
+            best_action_index = i
+    return best_action_index
+
+
+def benchmark_tree_policy(grid_size=7, num_runs=2000):
+    """
+    Times one UCT selection at a root with grid_size**2 actions, looped and vectorized
+    """
+    mcts = MCTS(Environment(grid_size), None, 1)
+    node = Node(None, is_final=False, is_root=True)
+    node.set_actions(list(range(grid_size**2)))
+    # Visits and values like after a few hundred simulations, with some ties
+    node.N_sa = np.random.randint(0, 20, size=grid_size**2)
+    node.E_t = np.round(np.random.uniform(-1, 1, size=grid_size**2)*node.N_sa)
+    node.Q_sa = np.where(node.N_sa > 0, node.E_t/np.maximum(node.N_sa, 1), 0)
+    node.N_s = int(np.sum(node.N_sa))
+    for p_num in (1, -1):
+        assert loop_tree_policy(mcts.c, node, p_num) == mcts.tree_policy(node, p_num)
+    print('Looped UCT:')
+    loop_time = test_time(loop_tree_policy, (mcts.c, node, 1), num_runs)
+    print('Vectorized UCT:')
+    vectorized_time = test_time(mcts.tree_policy, (node, 1), num_runs)
+    print('...speedup: {}x'.format(np.round(loop_time/vectorized_time, 1)))
+
+
+def benchmark_root_parallel(grid_size=5, M=2000, num_moves=3):
+    """
+    Simulations per second of root-parallel MCTS (random rollouts) for 1 up to all cores
+    """
+    env = Environment(grid_size)
+    state = env.generate_initial_state()
+    base_rate = None
+    for num_workers in range(1, multiprocessing.cpu_count()+1):
+        mcts = ParallelMCTS(env, None, 1, num_workers)
+        # First search also starts up the workers
+        mcts.simulate(1, num_workers, state)
+        start_time = time.time()
+        for _ in range(num_moves):
+            mcts.simulate(1, M, state)
+        rate = M*num_moves/(time.time() - start_time)
+        mcts.close()
+        base_rate = base_rate or rate
+        print('...{} workers: {} simulations per second ({}x)'.format(
+            num_workers, int(rate), np.round(rate/base_rate, 2)))
+
+
+def benchmark_puct(grid_size=5, move_time=0.05, num_games=20, params_path=None):
+    """
+    PUCT against UCT with the same time per move (random rollouts for both), alternating who starts.
+    PUCT uses the ANET in `params_path`, or an untrained one (which only shows the cost of the priors)
+    """
+    from NeuralNet import NeuralNet
+    neural_net = NeuralNet(grid_size**2+1)
+    if params_path:
+        neural_net.load_params(params_path)
+    env = Environment(grid_size)
+    puct_wins = 0
+    simulations = {'uct': 0, 'puct': 0}
+    for game in range(num_games):
+        searches = {'uct': MCTS(env, neural_net, 1), 'puct': MCTS(env, neural_net, 1, selection='puct')}
+        # P1 (1) always moves first
+        players = {1: 'puct' if game % 2 == 0 else 'uct', -1: 'uct' if game % 2 == 0 else 'puct'}
+        state = env.generate_initial_state()
+        player = 1
+        while not env.check_game_done(state):
+            mcts = searches[players[player]]
+            action, _ = mcts.simulate(player, None, state, move_time)
+            simulations[players[player]] += mcts.simulations_done
+            state = env.generate_child_state_from_action(state, action, player)
+            for other in searches.values():
+                other.advance(action)
+            player = -player
+        puct_wins += players[env.get_winner(state)] == 'puct'
+    print('...PUCT won {} of {} games, {} s per move'.format(puct_wins, num_games, move_time))
+    print('...simulations: UCT {}, PUCT {}'.format(simulations['uct'], simulations['puct']))
+
+
+if __name__ == '__main__':
+    # Usage: python benchmarks.py <name> [args], e.g. python benchmarks.py puct 5 0.05 20 ./params
+    # Arguments are strings, so each entry converts them
+    {'tree_policy': lambda grid_size=7, num_runs=2000: benchmark_tree_policy(int(grid_size), int(num_runs)),
+     'root_parallel': lambda grid_size=5, M=2000, num_moves=3: benchmark_root_parallel(
+         int(grid_size), int(M), int(num_moves)),
+     'puct': lambda grid_size=5, move_time=0.05, num_games=20, params_path=None: benchmark_puct(
+         int(grid_size), float(move_time), int(num_games), params_path)
+     }[sys.argv[1] if len(sys.argv) > 1 else 'tree_policy'](*sys.argv[2:])
@@ -4,7 +4,10 @@ from GlobalConstants import *
 from Game import *
 from Environment import Environment
 from MCTS import MCTS
-from NeuralNet import NeuralNet
+from ParallelMCTS import ParallelMCTS
+from TimeManager import TimeManager
+from SearchStats import SearchStats
+from NumpyNet import load_agent
 from utils import test_time
 from TOPP import TOPP
 from BasicClientActor import BasicClientActor
@@ -34,12 +37,16 @@ if __name__ == '__main__':
         ane = 1
         p1_wins = 0
         p1_start = 0
+        # Only training needs TensorFlow
+        from NeuralNet import NeuralNet
         neural_net = NeuralNet(input_shape)
 
         # List of training-data, rbuf_size x features
         rbuf_X = np.empty((1000, input_shape), dtype=np.ndarray)
         # List of target-data
         rbuf_y = np.empty((1000, grid_size*grid_size), dtype=np.ndarray)
+        # Value targets, the winner of the game of each example (known when the game is done)
+        rbuf_z = np.zeros(1000)
         # Counter for position in rbuf
         i = 0
         # Batch size for training
@@ -49,11 +56,33 @@ if __name__ == '__main__':
 
         # Save model before training
         neural_net.save_params(save_path+str(0))
+        if num_workers > 1:
+            # Worker processes are started once for the whole run
+            mcts = ParallelMCTS(Environment(grid_size, board_backend), neural_net, ane, num_workers,
+                                rollouts_per_leaf=rollouts_per_leaf,
+                                transposition_table_size=transposition_table_size,
+                                leaf_batch_size=leaf_batch_size,
+                                leaf_evaluation=leaf_evaluation,
+                                selection=selection,
+                                max_tree_memory=max_tree_memory,
+                                tree_memory_policy=tree_memory_policy,
+                                early_stop=early_stop,
+                                early_stop_confidence=early_stop_confidence,
+                                profile=profile)
+        if time_per_game:
+            # Each player has its own clock
+            time_managers = {p1: TimeManager(time_per_game), p2: TimeManager(time_per_game)}
         for j in range(G):
             start_time = time.time()
 
-            env = Environment(grid_size)
-            mcts = MCTS(env, neural_net, ane)
+            env = Environment(grid_size, board_backend)
+            if num_workers > 1:
+                mcts.random_leaf_eval_fraction = ane
+            else:
+                mcts = MCTS(env, neural_net, ane, rollouts_per_leaf,
+                            transposition_table_size, leaf_batch_size, leaf_evaluation, selection,
+                            max_tree_memory, tree_memory_policy, early_stop, early_stop_confidence,
+                            profile)
             print('...using {}% ANET evaluation'.format(
                 np.round((1-ane)*100, 3)))
             states_in_game = []
@@ -63,16 +92,37 @@ if __name__ == '__main__':
             player_number = P
             # Player add 1 if player_number is 1 (P1 starts)
             p1_start += player_number + 1 and 1
+            simulations = 0
+            simulations_saved = 0
+            peak_tree_memory = 0
+            # Summed SearchStats of the moves
+            game_stats = SearchStats()
+            # Rbuf rows of this game, their value targets are set when the winner is known
+            game_rows = []
+            if time_per_game:
+                for time_manager in time_managers.values():
+                    time_manager.new_game()
             while not env.check_game_done(state):
                 possible_actions = env.get_possible_actions_from_state(state)
-                # Do M simulations
-                best_action, D = mcts.simulate(player_number, M, state)
+                # Do M simulations, or fewer if the move's share of the clock runs out
+                time_budget = None
+                if time_per_game:
+                    time_budget = time_managers[player_number].start_move(len(possible_actions))
+                best_action, D = mcts.simulate(player_number, M, state, time_budget)
+                if time_per_game:
+                    time_managers[player_number].end_move()
+                simulations += mcts.simulations_done
+                simulations_saved += mcts.simulations_saved
+                peak_tree_memory = max(peak_tree_memory, mcts.memory_stats['peak_bytes'])
+                if profile:
+                    game_stats.add(mcts.stats)
 
                 # Add tuple of training example-data and target to RBUF
                 features = np.append(
-                    state, player_number)
+                    env.state_to_array(state), player_number)
                 rbuf_X[i % 1000] = features
                 rbuf_y[i % 1000] = D
+                game_rows.append(i % 1000)
                 # Increase counter
                 i += 1
 
@@ -80,15 +130,24 @@ if __name__ == '__main__':
                 state = env.generate_child_state_from_action(
                     state, best_action, player_number, verbose)
                 states_in_game.append(state)
+                if reuse_tree:
+                    # Keep the subtree of the played action for the next search
+                    mcts.advance(best_action)
                 # Next players turn
                 player_number ^= (p1 ^ p2)
             # Winner was the last player to make a move (one before player_number)
             winner = player_number ^ (p1 ^ p2)
+            rbuf_z[game_rows] = env.get_environment_value(winner)
             #print('Player {} wins'.format(winner))
             if winner == 1:
                 p1_wins += 1
-            print('*** Game {} done ***'.format(j+1))
-            if visualize:
+            print('*** Game {} done ({} simulations, {} saved by early stop, peak tree memory {} MB) ***'.format(
+                j+1, simulations, simulations_saved, np.round(peak_tree_memory/2**20, 1)))
+            if profile:
+                print(game_stats)
+            if visualize and export_path:
+                env.export_game(states_in_game, export_path + str(j+1) + export_format, 500)
+            elif visualize:
                 env.visualize(states_in_game, 500)
 
             # Do not train until the rbuf has filled up to batch size
@@ -111,7 +170,10 @@ if __name__ == '__main__':
                 # Get the same rows from X and y
                 train_X = rbuf_X[random_rows].astype(float)
                 train_y = rbuf_y[random_rows].astype(float)
-                neural_net.train_on_rbuf(train_X, train_y, batch_size)
+                train_z = rbuf_z[random_rows]
+                neural_net.train_on_rbuf(train_X, train_y, batch_size, train_z)
+                if num_workers > 1:
+                    mcts.sync_weights()
                 # Decay anet_fraction
                 ane *= random_leaf_eval_decay
 
@@ -123,6 +185,8 @@ if __name__ == '__main__':
 
         print('Player 1 wins {} of {} games ({}%).\nPlayer 1 started {}% of the time'.format(
             p1_wins, G, p1_wins/G*100, p1_start/G*100))
+        if num_workers > 1:
+            mcts.close()
 
     elif Menu == 'TOPP':
         print('******* WELCOME TO THE TOURNAMENT *******')
@@ -131,9 +195,8 @@ if __name__ == '__main__':
         agent_numbers = np.linspace(0, G, num_caches, dtype=int)
         for i in agent_numbers:
             print('...fetching agent ', i)
-            a = NeuralNet(input_shape)
-            a.load_params(load_path+str(i))
-            a.anet._name = 'ANET_'+str(i)
+            a = load_agent(load_path+str(i), input_shape)
+            a.name = 'ANET_'+str(i)
             agents.append(a)
 
         topp = TOPP(agents, policy)
@@ -149,8 +212,7 @@ if __name__ == '__main__':
 
         """
         # Load agent to play against
-        computer_agent = NeuralNet(input_shape)
-        computer_agent.load_params(load_path)
+        computer_agent = load_agent(load_path, input_shape)
 
         env = Environment(grid_size)
         state = env.generate_initial_state()
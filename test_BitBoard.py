@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from BitBoard import BitBoard
+from Board import Board
+
+
+@pytest.mark.parametrize('grid_size', [1, 2, 4, 6, 9])
+def test_matches_array_board(grid_size):
+    board = Board(grid_size)
+    bit_board = BitBoard(grid_size)
+    rng = np.random.default_rng(grid_size)
+    for _ in range(20):
+        grid = board.get_initial_state()
+        state = bit_board.get_initial_state()
+        player = 1
+        for ind in rng.permutation(grid_size**2):
+            assert list(bit_board.get_possible_actions_from_state(state)) == \
+                list(board.get_possible_actions_from_state(grid))
+            grid = board.get_state_from_state_action(grid, ind, player, False)
+            state = bit_board.get_state_from_state_action(state, ind, player, False)
+            assert np.array_equal(bit_board.to_array(state), grid)
+            assert bit_board.from_array(np.asarray(grid)) == state
+            assert bit_board.get_winner(state) == board.get_grid_winner(np.asarray(grid))
+            assert np.array_equal(bit_board.to_array(bit_board.flip_board(state)), board.flip_board(grid))
+            player = -player
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from Board import Board
+
+
+@pytest.mark.parametrize('grid_size', [1, 3, 5, 8])
+def test_batch_winners_match_path_search(grid_size):
+    board = Board(grid_size)
+    rng = np.random.default_rng(grid_size)
+    # Random grids with few to no empty cells, so all outcomes are common
+    boards = np.concatenate([rng.choice([-1, 0, 1], size=(200, grid_size**2), p=(0.5-fill/2, fill, 0.5-fill/2))
+                             for fill in (0, 0.2, 0.5)])
+    winners = board.check_game_done_batch(boards)
+    assert list(winners) == [board.get_grid_winner(grid) for grid in boards]
+
+
+def test_batch_of_none():
+    assert len(Board(4).check_game_done_batch(np.zeros((0, 16), dtype=int))) == 0
+
+
+def test_incremental_keys_match_recomputed():
+    board = Board(5)
+    rng = np.random.default_rng(0)
+    keys = {}
+    for _ in range(20):
+        grid = board.get_initial_state()
+        player = 1
+        for ind in rng.permutation(25)[:15]:
+            grid = board.get_state_from_state_action(grid, ind, player, False)
+            key = board.get_state_key(grid)
+            assert key == board.get_state_key(np.asarray(grid))
+            # Equal grids have equal keys, and different grids different keys (no collisions here)
+            assert keys.setdefault(key, tuple(grid)) == tuple(grid)
+            player = -player
+
+
+def test_transpositions_have_equal_keys():
+    board = Board(4)
+    grid_a = board.get_initial_state()
+    grid_b = board.get_initial_state()
+    for ind, player in ((0, 1), (5, -1), (10, 1)):
+        grid_a = board.get_state_from_state_action(grid_a, ind, player, False)
+    for ind, player in ((10, 1), (5, -1), (0, 1)):
+        grid_b = board.get_state_from_state_action(grid_b, ind, player, False)
+    assert board.get_state_key(grid_a) == board.get_state_key(grid_b)
+    assert board.get_state_key(grid_a) != board.get_state_key(board.flip_board(grid_a))
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from Board import Board
+from GameState import GameState
+from Geometry import get_geometry
+
+
+def snapshot(game):
+    return game.grid.copy(), game.player, sorted(game.empty), game.winner, game.key
+
+
+@pytest.mark.parametrize('grid_size', [2, 4, 7])
+def test_play_and_undo_round_trip(grid_size):
+    board = Board(grid_size)
+    geometry = get_geometry(grid_size)
+    rng = np.random.default_rng(grid_size)
+    for _ in range(10):
+        start = np.zeros(grid_size**2, dtype=int)
+        start[rng.permutation(grid_size**2)[:grid_size]] = rng.choice([-1, 1], size=grid_size)
+        game = GameState(geometry, start, 1)
+        snapshots = [snapshot(game)]
+        for move in rng.permutation(list(game.empty)):
+            game.play(move)
+            assert game.winner == board.get_grid_winner(game.grid)
+            assert game.key == board.get_state_key(game.grid)
+            snapshots.append(snapshot(game))
+        snapshots.pop()
+        while game.history:
+            game.undo()
+            grid, player, empty, winner, key = snapshots.pop()
+            assert np.array_equal(game.grid, grid)
+            assert (game.player, sorted(game.empty), game.winner, game.key) == (player, empty, winner, key)
+        assert np.array_equal(game.grid, start)
+
+
+def test_play_on_piece_raises():
+    game = GameState(get_geometry(3), np.zeros(9, dtype=int), 1)
+    game.play(4)
+    with pytest.raises(ValueError):
+        game.play(4)
+
+
+def test_connectivity_copy_keeps_undo_log():
+    geometry = get_geometry(3)
+    game = GameState(geometry, np.zeros(9, dtype=int), 1)
+    for move in (0, 1, 3, 2, 6):
+        game.play(move)
+    assert game.winner == 1
+    tracker = game.connectivity.copy()
+    tracker.undo_stone()
+    assert tracker.winner == 0
+    assert game.connectivity.winner == 1
+    game.undo()
+    assert game.winner == 0
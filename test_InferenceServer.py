@@ -0,0 +1,103 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import wait
+
+import numpy as np
+import pytest
+
+from InferenceServer import InferenceServer
+
+
+class UniformNet:
+    # Uniform over the empty cells, fails on boards where the first cell is 2
+    def get_action_distributions(self, states, players):
+        if (states[:, 0] == 2).any():
+            raise ValueError('bad board')
+        action_probabilities = (states == 0).astype(float)
+        return action_probabilities/np.sum(action_probabilities, axis=1, keepdims=True)
+
+
+def random_states(rng, count, cells=9):
+    states = rng.choice([-1, 0, 1], size=(count, cells))
+    states[:, -1] = 0
+    return states
+
+
+@pytest.fixture
+def server():
+    server = InferenceServer(UniformNet(), max_batch_size=16, max_latency=0.01)
+    yield server
+    server.close()
+
+
+def test_threads(server):
+    expected = {}
+    results = {}
+
+    def search(i):
+        states = random_states(np.random.default_rng(i), 3)
+        expected[i] = UniformNet().get_action_distributions(states, np.ones(3))
+        results[i] = server.get_action_distributions(states, [1, 1, 1])
+
+    threads = [threading.Thread(target=search, args=(i, )) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for i in range(8):
+        assert np.allclose(results[i], expected[i])
+    assert server.get_stats()['requests'] == 8
+
+
+def test_asyncio(server):
+    states = random_states(np.random.default_rng(0), 2)
+
+    async def search():
+        return await asyncio.gather(*[server.get_action_distributions_async(states, [1, -1])
+                                      for _ in range(5)])
+
+    for result in asyncio.run(search()):
+        assert np.allclose(result, UniformNet().get_action_distributions(states, None))
+
+
+def test_failed_batch_does_not_stop_server(server):
+    with pytest.raises(ValueError):
+        server.get_action_distributions(np.full((1, 9), 2), [1])
+    # Boards of different sizes in one batch
+    futures = [server.submit(np.zeros((1, 9)), [1]), server.submit(np.zeros((1, 16)), [1])]
+    _, not_done = wait(futures, timeout=10)
+    assert not not_done
+    assert server.thread.is_alive()
+    assert np.allclose(server.get_action_distributions(np.zeros((1, 4)), [1]), 0.25)
+
+
+def test_submit_checks_shapes(server):
+    with pytest.raises(ValueError):
+        server.submit(np.zeros(9), [1])
+    with pytest.raises(ValueError):
+        server.submit(np.zeros((2, 9)), [1])
+
+
+def search_in_process(client, results):
+    states = random_states(np.random.default_rng(0), 4)
+    results.put(('ok', client.get_action_distributions(states, np.ones(4))))
+    try:
+        client.get_action_distributions(np.full((1, 9), 2), [1])
+        results.put(('error', None))
+    except RuntimeError as e:
+        results.put(('error', str(e)))
+    results.put(('ok', client.get_action_distributions(np.zeros((1, 9)), [1])))
+
+
+def test_process(server):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=search_in_process, args=(server.connect(), results))
+    process.start()
+    states = random_states(np.random.default_rng(0), 4)
+    assert np.allclose(results.get(timeout=60)[1], UniformNet().get_action_distributions(states, None))
+    assert 'bad board' in results.get(timeout=60)[1]
+    assert np.allclose(results.get(timeout=60)[1], 1/9)
+    process.join(timeout=60)
+    assert process.exitcode == 0
@@ -0,0 +1,28 @@
+import random
+
+import numpy as np
+
+from Environment import Environment
+from MCTS import MCTS
+
+
+def search(env, state, M, early_stop_interval, seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    mcts = MCTS(env, None, 1, early_stop=True)
+    mcts.early_stop_interval = early_stop_interval
+    action, _ = mcts.simulate(1, M, state)
+    return action, mcts
+
+
+def test_early_stop_keeps_the_action():
+    env = Environment(4)
+    state = env.generate_initial_state()
+    # With some of these seeds the action with the highest value changes after the stop (seed 21)
+    for seed in range(25):
+        action, mcts = search(env, state, 300, 10, seed)
+        assert mcts.simulations_saved == 300 - mcts.simulations_done
+        # The same simulations continued to the end of the budget choose the same action
+        full_action, full_mcts = search(env, state, 300, 301, seed)
+        assert full_mcts.simulations_done == 300
+        assert action == full_action
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from Environment import Environment
+from MCTS import MCTS
+from NodePool import NodePool
+from NumpyNet import NumpyNet
+
+
+def test_allocate_release_and_limit():
+    pool = NodePool(4, chunk_size=2)
+    pool.max_nodes = 3
+    slots = [pool.allocate() for _ in range(3)]
+    assert slots == [0, 1, 2]
+    assert pool.allocate() is None
+    actions, N_sa, Q_sa, E_t, priors = pool.get_arrays(slots[2], 3)
+    N_sa[:] = 5
+    assert len(actions) == 3
+    assert pool.get_arrays(slots[2], 4)[1].tolist() == [5, 5, 5, 0]
+    assert pool.get_arrays(slots[1], 4)[1].tolist() == [0, 0, 0, 0]
+    pool.release(slots[1])
+    assert pool.get_stats()['nodes'] == 2
+    assert pool.get_stats()['peak_nodes'] == 3
+    assert pool.allocate() == slots[1]
+    pool.reset()
+    assert pool.get_stats()['nodes'] == 0
+    assert sorted(pool.allocate() for _ in range(3)) == slots
+
+
+def test_max_bytes():
+    pool = NodePool(9, max_bytes=10000)
+    assert pool.max_nodes == 10000//pool.bytes_per_node
+    assert sum(pool.allocate() is not None for _ in range(pool.max_nodes + 5)) == pool.max_nodes
+
+
+def check_expanded(node):
+    # Every visit of an expanded node went on to one of its actions, returns the expanded nodes
+    if node.children is None:
+        return 0
+    assert node.is_root or node.N_s == node.N_sa.sum()
+    return 1 + sum(check_expanded(child) for child in node.children if child is not None)
+
+
+# Statistics written to reused rows show up as divisions by zero visits
+@pytest.mark.filterwarnings('error')
+def test_limited_search_with_batched_leaves():
+    env = Environment(4)
+    rng = np.random.default_rng(0)
+    sizes = [17, 32, 16]
+    weights = []
+    for inputs, outputs in zip(sizes[:-1], sizes[1:]):
+        weights += [rng.normal(size=(inputs, outputs)), np.zeros(outputs)]
+    neural_net = NumpyNet(weights, ['relu', 'softmax'])
+    for policy in ('evict', 'stop'):
+        mcts = MCTS(env, neural_net, 0, leaf_batch_size=8, max_tree_memory=20000, tree_memory_policy=policy)
+        mcts.simulate(1, 1000, env.generate_initial_state())
+        assert mcts.root.N_s == mcts.root.N_sa.sum() == 1000
+        assert mcts.memory_stats['peak_nodes'] <= mcts.pool.max_nodes
+        # Pooled nodes in the tree are all the nodes in use (and the root, which may have its own arrays)
+        assert check_expanded(mcts.root) - (mcts.root.slot is None) == mcts.pool.nodes_in_use
+
+
+def reachable_nodes(root):
+    # Nodes that can be reached from `root`, each once
+    reachable = {}
+    nodes = [root]
+    while nodes:
+        node = nodes.pop()
+        if id(node) in reachable:
+            continue
+        reachable[id(node)] = node
+        if node.children is not None:
+            nodes.extend(child for child in node.children if child is not None)
+    return reachable
+
+
+def test_limited_search_with_transpositions_frees_rows():
+    env = Environment(5)
+    mcts = MCTS(env, None, 1, transposition_table_size=1000, max_tree_memory=200000)
+    state = env.generate_initial_state()
+    player = 1
+    for _ in range(6):
+        action, _ = mcts.simulate(player, 300, state)
+        state = env.generate_child_state_from_action(state, action, player)
+        mcts.advance(action)
+        player = -player
+        # Rows and table entries of the nodes left behind are free again
+        reachable = reachable_nodes(mcts.root)
+        pooled = sum(node.slot is not None for node in reachable.values())
+        assert mcts.pool.nodes_in_use == pooled < mcts.pool.max_nodes
+        assert all(id(node) in reachable for node in mcts.transpositions.nodes.values())
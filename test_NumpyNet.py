@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from GlobalConstants import grid_size
+from NumpyNet import NumpyNet, load_agent
+
+# Keras is only needed for the nets compared with
+pytest.importorskip('tensorflow')
+import NeuralNet
+
+
+def random_positions(rng, count):
+    states = rng.choice([-1, 0, 1], size=(count, grid_size**2), p=(0.3, 0.4, 0.3))
+    states[0] = 0
+    # A position with a single empty cell
+    states[1] = 1
+    states[1, 0] = 0
+    players = rng.choice([-1, 1], size=count)
+    return states, players
+
+
+def keras_distributions(neural_net, states, players):
+    # Masked and normalized as NeuralNet did before it used NumpyNet
+    features = np.column_stack((states, players)).astype(float)
+    action_probabilities = np.where(states, 0, neural_net.policy_net.predict(features, verbose=0))
+    return action_probabilities/np.sum(action_probabilities, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize('value_head', [False, True])
+def test_matches_keras(monkeypatch, value_head):
+    monkeypatch.setattr(NeuralNet, 'value_head', value_head)
+    neural_net = NeuralNet.NeuralNet(grid_size**2 + 1)
+    rng = np.random.default_rng(0)
+    states, players = random_positions(rng, 50)
+    # Train a little, so the comparison is with the synced weights and not the initial ones
+    targets = rng.dirichlet(np.ones(grid_size**2), size=50)
+    features = np.column_stack((states, players)).astype(float)
+    neural_net.train_on_rbuf(features, targets, 16, rng.choice([-1.0, 1.0], size=50))
+    action_probabilities = neural_net.get_action_distributions(states, players)
+    assert np.allclose(action_probabilities, keras_distributions(neural_net, states, players), atol=1e-5)
+    assert np.allclose(action_probabilities.sum(axis=1), 1)
+    assert not action_probabilities[states != 0].any()
+    if value_head:
+        values = neural_net.value_net.predict(features, verbose=0)[:, 0]
+        assert np.allclose(neural_net.get_values(states, players), values, atol=1e-5)
+
+
+def test_saved_weights_load_without_keras(tmp_path):
+    neural_net = NeuralNet.NeuralNet(grid_size**2 + 1)
+    path = str(tmp_path / 'anet')
+    neural_net.save_params(path)
+    agent = load_agent(path, grid_size**2 + 1)
+    assert type(agent) is NumpyNet
+    states, players = random_positions(np.random.default_rng(1), 20)
+    assert np.allclose(agent.get_action_distributions(states, players),
+                       neural_net.get_action_distributions(states, players))
+
+
+def test_weight_changes_clear_policy_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr('NumpyNet.policy_cache_size', 100)
+    neural_net = NeuralNet.NeuralNet(grid_size**2 + 1)
+    path = str(tmp_path / 'anet')
+    neural_net.save_params(path)
+    states, players = random_positions(np.random.default_rng(2), 10)
+    features = np.column_stack((states, players)).astype(float)
+    targets = np.full((10, grid_size**2), 1/grid_size**2)
+    changes = [lambda: neural_net.train_on_rbuf(features, targets, 5),
+               lambda: neural_net.load_params(path),
+               lambda: neural_net.set_weights(neural_net.anet.get_weights())]
+    for change in changes:
+        neural_net.get_action_distributions(states, players)
+        assert len(neural_net.policy_cache) == 10
+        change()
+        assert len(neural_net.policy_cache) == 0
+        # Predictions after the change are from the new weights
+        assert np.allclose(neural_net.get_action_distributions(states, players),
+                           keras_distributions(neural_net, states, players), atol=1e-5)
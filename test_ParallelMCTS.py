@@ -0,0 +1,39 @@
+import numpy as np
+
+from Environment import Environment
+from NumpyNet import NumpyNet
+from ParallelMCTS import ParallelMCTS
+
+
+def test_search_and_reset():
+    env = Environment(3)
+    mcts = ParallelMCTS(env, None, 1, 2, max_tree_memory=100000)
+    try:
+        state = env.generate_initial_state()
+        action, action_distribution = mcts.simulate(1, 100, state)
+        assert mcts.root.N_s == 100
+        assert action in env.get_possible_actions_from_state(state)
+        assert abs(action_distribution.sum() - 1) < 1e-9
+        # Methods of MCTS use the node pool, which must not be the worker pool
+        mcts.reset()
+        assert mcts.root is None
+        assert mcts.memory_stats['nodes'] > 0
+    finally:
+        mcts.close()
+
+
+def test_workers_use_the_layout_of_the_net():
+    env = Environment(3)
+    rng = np.random.default_rng(0)
+    # Two layers, unlike the net of GlobalConstants
+    weights = [rng.normal(size=(10, 20)), np.zeros(20), rng.normal(size=(20, 9)), np.zeros(9)]
+    neural_net = NumpyNet(weights, ['tanh', 'softmax'])
+    mcts = ParallelMCTS(env, neural_net, 0, 2)
+    try:
+        for _ in range(2):
+            mcts.simulate(1, 40, env.generate_initial_state())
+            assert mcts.root.N_s == 40
+            neural_net.set_weights([weight*0.5 for weight in weights])
+            mcts.sync_weights()
+    finally:
+        mcts.close()
@@ -0,0 +1,62 @@
+import numpy as np
+
+from NumpyNet import NumpyNet
+from PolicyCache import PolicyCache
+
+
+def make_net(monkeypatch, cache_size=100):
+    monkeypatch.setattr('NumpyNet.policy_cache_size', cache_size)
+    rng = np.random.default_rng(0)
+    weights = [rng.normal(size=(10, 16)), np.zeros(16), rng.normal(size=(16, 9)), np.zeros(9)]
+    return NumpyNet(weights, ['relu', 'softmax'])
+
+
+def test_evicts_least_recently_used():
+    cache = PolicyCache(2)
+    for player in (1, -1):
+        cache.put(cache.get_key(np.zeros(4), player), np.full(4, 0.25))
+    assert cache.get(cache.get_key(np.zeros(4, dtype=float), 1)) is not None
+    cache.put(cache.get_key(np.ones(4), 1), np.full(4, 0.25))
+    assert cache.get(cache.get_key(np.zeros(4), -1)) is None
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_rows_of_a_batch_are_copied():
+    cache = PolicyCache(10)
+    batch = np.full((100, 4), 0.25)
+    cache.put(cache.get_key(np.zeros(4), 1), batch[0])
+    cached = cache.get(cache.get_key(np.zeros(4), 1))
+    assert cached.base is None
+    assert not cached.flags.writeable
+    assert batch.flags.writeable
+
+
+def test_hits_and_misses(monkeypatch):
+    neural_net = make_net(monkeypatch)
+    rng = np.random.default_rng(1)
+    states = rng.choice([-1, 0, 1], size=(6, 9))
+    states[:, 0] = 0
+    players = np.array([1, -1, 1, -1, 1, -1])
+    expected = neural_net.predict_action_distributions(states, players)
+    assert np.allclose(neural_net.get_action_distributions(states[:4], players[:4]), expected[:4])
+    assert (neural_net.policy_cache.hits, neural_net.policy_cache.misses) == (0, 4)
+    assert np.allclose(neural_net.get_action_distributions(states, players), expected)
+    assert (neural_net.policy_cache.hits, neural_net.policy_cache.misses) == (4, 6)
+    assert np.allclose(neural_net.get_action_distribution(states[5], players[5]), expected[5])
+    assert (neural_net.policy_cache.hits, neural_net.policy_cache.misses) == (5, 6)
+    assert len(neural_net.policy_cache) == 6
+
+
+def test_set_weights_clears_cache(monkeypatch):
+    neural_net = make_net(monkeypatch)
+    neural_net.get_action_distribution(np.zeros(9), 1)
+    assert len(neural_net.policy_cache) == 1
+    neural_net.set_weights([weight*2 for weight in neural_net.get_weights()])
+    assert len(neural_net.policy_cache) == 0
+
+
+def test_no_cache(monkeypatch):
+    neural_net = make_net(monkeypatch, 0)
+    assert neural_net.policy_cache is None
+    assert np.allclose(neural_net.get_action_distributions(np.zeros((2, 9)), [1, -1]).sum(axis=1), 1)
@@ -0,0 +1,62 @@
+import numpy as np
+
+from Environment import Environment
+from MCTS import MCTS
+from Node import Node
+from TranspositionTable import TranspositionTable
+
+
+def test_evicts_least_recently_used():
+    table = TranspositionTable(2)
+    nodes = [Node(None, is_final=False) for _ in range(3)]
+    table.put(1, nodes[0])
+    table.put(2, nodes[1])
+    assert table.get(1) is nodes[0]
+    table.put(3, nodes[2])
+    assert len(table) == 2
+    assert table.get(2) is None
+    assert table.get(1) is nodes[0]
+    assert table.get(3) is nodes[2]
+    assert (table.hits, table.misses, table.evictions) == (3, 1, 1)
+    table.clear()
+    assert len(table) == 0
+
+
+def test_transposed_states_share_a_node():
+    env = Environment(3)
+    mcts = MCTS(env, None, 1, transposition_table_size=100)
+    nodes = []
+    for moves in ((0, 8, 4), (4, 8, 0)):
+        game = env.new_game_state(env.generate_initial_state(), 1)
+        for move in moves:
+            game.play(move)
+        nodes.append(mcts.get_node(game))
+    assert nodes[0] is nodes[1]
+    game.undo()
+    assert mcts.get_node(game) is not nodes[0]
+
+
+def test_search_with_table():
+    env = Environment(3)
+    mcts = MCTS(env, None, 1, transposition_table_size=10000)
+    mcts.simulate(1, 500, env.generate_initial_state())
+    assert mcts.root.N_s == mcts.root.N_sa.sum() == 500
+    assert len(mcts.transpositions) > 0
+
+
+def test_searches_without_advance_start_over():
+    env = Environment(4)
+    mcts = MCTS(env, None, 1, transposition_table_size=10000)
+    state = env.generate_initial_state()
+    player = 1
+    old_root = None
+    for _ in range(4):
+        action, action_distribution = mcts.simulate(player, 300, state)
+        # Only the visits of this search, also when the state was in the table
+        assert mcts.root.N_s == mcts.simulations_done == 300
+        assert np.allclose(action_distribution[mcts.root.actions], mcts.root.N_sa/300)
+        if old_root is not None:
+            assert not old_root.is_root
+        old_root = mcts.root
+        state = env.generate_child_state_from_action(state, action, player)
+        player = -player
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from Board import Board
+from Geometry import get_geometry
+from UnionFind import UnionFind
+
+
+def random_game(board, rng):
+    """
+    Plays random moves until the board is full, also past a win
+
+    :returns: list of the states after each move
+    """
+    state = board.get_initial_state()
+    player = 1
+    states = []
+    for ind in rng.permutation(board.grid_size**2):
+        state = board.get_state_from_state_action(state, ind, player, False)
+        states.append(state)
+        player = -player
+    return states
+
+
+@pytest.mark.parametrize('grid_size', [1, 2, 3, 5, 7])
+def test_winner_matches_path_search(grid_size):
+    board = Board(grid_size)
+    rng = np.random.default_rng(grid_size)
+    for _ in range(20):
+        for state in random_game(board, rng):
+            assert state.connectivity is not None
+            assert board.get_winner(state) == board.get_grid_winner(np.asarray(state))
+
+
+def test_from_grid_matches_path_search():
+    geometry = get_geometry(6)
+    board = Board(6)
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        for state in random_game(board, rng):
+            grid = np.asarray(state)
+            assert UnionFind.from_grid(geometry, grid).winner == board.get_grid_winner(grid)
+
+
+def test_copy_is_independent():
+    geometry = get_geometry(3)
+    grid = np.zeros(9, dtype=int)
+    tracker = UnionFind(geometry)
+    for ind in (0, 3):
+        grid[ind] = 1
+        tracker.add_stone(grid, ind, 1)
+    copy = tracker.copy()
+    grid[6] = 1
+    copy.add_stone(grid, 6, 1)
+    assert copy.winner == 1
+    assert tracker.winner == 0